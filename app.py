@@ -1,15 +1,145 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, Response, render_template, request, redirect, url_for, session, flash, jsonify, g, send_from_directory
+from werkzeug.local import LocalProxy
 from werkzeug.utils import secure_filename
+import json
 import os
-import pandas as pd
-from backend.backend import ProjectManagementApp  # Correct import path
+import pickle
+import re
+import time
+import uuid
+from backend.charts import ChartCache
+from backend.jobs import Job, JobQueue, run_method
+from backend.store import ProjectStore
+from backend.uploads import UploadCache
 
 app = Flask(__name__)
-app.secret_key = 'supersecretkey'
+app.secret_key = os.environ.get('SECRET_KEY', 'supersecretkey')
 UPLOAD_FOLDER = 'uploads'
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-
-project_app = ProjectManagementApp()
+app.config['CHART_FOLDER'] = 'charts'
+app.config['PARSED_FOLDER'] = 'parsed_uploads'
+# Projects at least this large are computed and drawn by background jobs
+app.config['BACKGROUND_MIN_ACTIVITIES'] = 2000
+# Upper bound on Monte Carlo iterations per /simulation_data request
+app.config['SIMULATION_MAX_ITERATIONS'] = 200000
+# Upper bound on the search time of one portfolio search, in seconds
+app.config['PORTFOLIO_MAX_SECONDS'] = 60
+
+# One project per browser session, evicted least recently used first. Routes
+# use project_app, which always points at the current session's project.
+projects = ProjectStore()
+# Parsed workbooks by content hash, shared by every session and route
+# (kept outside UPLOAD_FOLDER, so no upload can ever land in it)
+uploads = UploadCache(cache_dir=app.config['PARSED_FOLDER'])
+project_app = LocalProxy(lambda: g.project_entry.project)
+# Rendered charts by content hash of the project they were drawn from
+charts = ChartCache(app.config['CHART_FOLDER'])
+# Renders and solves for large projects, off the request threads
+jobs = JobQueue(workers=min(4, os.cpu_count() or 1))
+
+def valid_project_id(project_id):
+    # Session ids are uuid4 hex strings; the id names the session's upload
+    # folder, so anything else (e.g. '..' in a forged cookie) is refused
+    return isinstance(project_id, str) and re.fullmatch(r'[0-9a-f]{32}', project_id) is not None
+
+def upload_path(filename):
+    # Each session uploads into its own folder, so equal file names never collide
+    if not valid_project_id(session.get('project_id')):
+        raise ValueError("Invalid session.")
+    folder = os.path.join(app.config['UPLOAD_FOLDER'], session['project_id'])
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, filename)
+
+def in_background():
+    return len(project_app.activities) >= app.config['BACKGROUND_MIN_ACTIVITIES']
+
+def start_job(method, *args, keep=False, on_done=None, **kwargs):
+    # Run a method of the session's project in the job pool, on a copy taken
+    # now. Identical calls on identical projects share one job. With keep,
+    # the session adopts the copy the job leaves behind on its next request,
+    # unless its own project has changed in the meantime
+    key = (method, project_app.fingerprint(), args, tuple(sorted(kwargs.items())))
+    job = jobs.find(key)
+    if job is None:
+        payload = pickle.dumps(g.project_entry.project, protocol=pickle.HIGHEST_PROTOCOL)
+        job = jobs.submit(key, method, run_method, payload, method, args, kwargs, keep, on_done=on_done)
+    if keep and job.id not in session.get('jobs', []):
+        session['jobs'] = session.get('jobs', []) + [job.id]
+    return job
+
+def collect_jobs():
+    # Adopt the projects left behind by this session's finished jobs
+    pending = []
+    for job_id in session['jobs']:
+        job = jobs.get(job_id)
+        if job is None or job.state == 'failed':
+            continue
+        if job.state != 'done':
+            pending.append(job_id)
+            continue
+        result, project = job.result()
+        if project_app.fingerprint() != job.key[1]:
+            flash(f"The project changed while {job.kind} was running, so its result was dropped.", 'warning')
+            continue
+        projects.reset(g.project_entry, pickle.loads(project))
+        if job.kind == 'level_resources':
+            flash(leveling_message(*result), 'success')
+        elif job.kind == 'optimize_resource_schedule':
+            flash(f"Resource-constrained schedule finishes on day {result.makespan}.", 'success')
+    session['jobs'] = pending
+
+def wait_for(job, next_url=None):
+    # Page that follows a background job and moves on to next_url once done
+    if not next_url or not next_url.startswith('/') or next_url.startswith('//'):
+        next_url = url_for('home')
+    return render_template('job_wait.html', job=job.status(), next_url=next_url)
+
+def chart_url(chart, **options):
+    # URL of a chart of the session's project, drawn only when the project or
+    # the options changed since it was last rendered. A large project's chart
+    # is drawn by a background job instead, and the Job is returned
+    state = project_app.fingerprint()
+    name = charts.chart_name(chart, state, options)
+    if not charts.cached(name) and in_background():
+        partial = charts.partial_path(name, 'job')
+        return start_job('render_chart', chart, partial, on_done=lambda result: charts.add(name, partial), **options)
+    charts.render(chart, state, lambda path: project_app.render_chart(chart, path, **options), options)
+    return url_for('chart_image', name=name)
+
+def show_chart(template, chart, options=None, **context):
+    # template with graph_url set to the chart, or the waiting page while a
+    # background job draws it
+    graph_url = chart_url(chart, **(options or {}))
+    if isinstance(graph_url, Job):
+        return wait_for(graph_url, request.full_path)
+    return render_template(template, graph_url=graph_url, **context)
+
+def leveling_message(before, after):
+    return (f"Resources leveled: peak usage {before.total.max(initial=0)} -> {after.total.max(initial=0)}, "
+            f"resource moment {sum(before.moment().values()):.0f} -> {sum(after.moment().values()):.0f}.")
+
+@app.before_request
+def checkout_project():
+    if request.endpoint in (None, 'static', 'chart_image', 'job_status', 'job_events', 'job_wait'):
+        return
+    if not valid_project_id(session.get('project_id')):
+        session.clear()
+        session['project_id'] = uuid.uuid4().hex
+    g.project_entry, created = projects.checkout(session['project_id'])
+    # An evicted project is rebuilt from the file the session last uploaded
+    filename = session.get('filename')
+    if created and filename and request.endpoint != 'upload_file':
+        filepath = upload_path(filename)
+        if os.path.exists(filepath):
+            process_excel(filepath)
+    if session.get('jobs'):
+        collect_jobs()
+
+@app.teardown_request
+def release_project(exception=None):
+    entry = g.pop('project_entry', None)
+    if entry is not None:
+        projects.release(entry)
 
 @app.route('/')
 def loading_screen():
@@ -30,16 +160,34 @@ def upload_file():
         return redirect(request.url)
     if file:
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        filepath = upload_path(filename)
         file.save(filepath)
-        process_excel(filepath)
+        # "Update" applies a revised file to the current project instead of
+        # starting over, keeping manual start times that are still valid
+        update = request.form.get('mode') == 'update' and bool(project_app.activities)
+        try:
+            if update:
+                report, changes = update_excel(filepath)
+            else:
+                report = process_excel(filepath)
+        except ValueError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('home'))
+        if not report.ok:
+            for message in report.errors:
+                flash(message, 'danger')
+            return redirect(url_for('home'))
+        for message in report.warnings:
+            flash(message, 'warning')
+        if update:
+            added, removed, changed = changes
+            flash(f"Project updated: {len(added)} activities added, {len(removed)} removed, {len(changed)} changed.", 'success')
         session['filename'] = filename
         return redirect(url_for('display_excel', filename=filename))
 
 @app.route('/display_excel/<filename>')
 def display_excel(filename):
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    df = pd.read_excel(filepath)
+    df = uploads.load(upload_path(filename)).frame
 
     # Exclude columns you don't want to display
     columns_to_exclude = [
@@ -65,15 +213,13 @@ def generate_aoa():
         flash("No file uploaded", 'danger')
         return redirect(url_for('home'))
     
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    df = pd.read_excel(filepath)
+    df = uploads.load(upload_path(filename)).frame
 
     # Select specific columns for display
     aoa_data = df[['Activity', 'Duration', 'Predecessors']].to_dict(orient='records')
 
     # Generate the AOA diagram
-    project_app.generate_aoa('static/aoa_graph.png')
-    return render_template('display_graph.html', graph_url=url_for('static', filename='aoa_graph.png'), data=aoa_data)
+    return show_chart('display_graph.html', 'aoa_graph', data=aoa_data)
 
 @app.route('/generate_aon')
 def generate_aon():
@@ -83,26 +229,21 @@ def generate_aon():
         flash("No file uploaded", 'danger')
         return redirect(url_for('home'))
     
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    df = pd.read_excel(filepath)
+    df = uploads.load(upload_path(filename)).frame
 
     # Select specific columns for display
     aon_data = df[['Activity', 'Duration', 'Predecessors']].to_dict(orient='records')
 
     # Generate the AON diagram
-    project_app.generate_aon('static/aon_graph.png')
-    return render_template('display_graph.html', graph_url=url_for('static', filename='aon_graph.png'), data=aon_data)
+    return show_chart('display_graph.html', 'aon_graph', data=aon_data)
 
 
 @app.route('/generate_duration_vs_resources')
 def generate_duration_vs_resources():
-    project_app.plot_duration_vs_resources(before_smoothing=True)
     return redirect(url_for('display_duration_vs_resources'))
 
 @app.route('/generate_gantt_chart')
 def generate_gantt_chart():
-    critical_path_data = project_app.calculate_critical_path()
-    project_app.plot_sequence_of_events(critical_path_data['critical_path'], before_smoothing=True)
     return redirect(url_for('display_gantt_chart'))
 
 @app.route('/generate_resource_smoothing', methods=['GET', 'POST'])
@@ -114,44 +255,84 @@ def generate_resource_smoothing():
         try:
             message = project_app.adjust_non_critical_path_activity(activity_name, new_start_time)
             flash(message, 'success')
-            # Regenerate the resource leveling Gantt chart with adjusted start times
-            project_app.plot_resource_smoothing('static/resource_smoothing_gantt_chart.png')
         except ValueError as e:
             flash(str(e), 'danger')
 
-    # Generate the resource leveling Gantt chart
-    project_app.plot_resource_smoothing('static/resource_smoothing_gantt_chart.png')
-    return render_template('display_resource_smoothing.html', graph_url=url_for('static', filename='resource_smoothing_gantt_chart.png'))
+    # The resource leveling Gantt chart, with any adjusted start times
+    return show_chart('display_resource_smoothing.html', 'resource_smoothing_gantt_chart')
+
+@app.route('/level_resources', methods=['POST'])
+def level_resources():
+    objective = request.form.get('objective', 'moment')
+    if in_background():
+        job = start_job('level_resources', objective, keep=True)
+        return redirect(url_for('job_wait', job_id=job.id, next=url_for('display_resource_smoothing')))
+    try:
+        before, after = project_app.level_resources(objective)
+        flash(leveling_message(before, after), 'success')
+    except ValueError as e:
+        flash(str(e), 'danger')
+    return redirect(url_for('display_resource_smoothing'))
+
+@app.route('/resource_constrained_schedule', methods=['POST'])
+def resource_constrained_schedule():
+    method = request.form.get('method', 'serial')
+    rule = request.form.get('rule', 'lft')
+    try:
+        if method == 'portfolio':
+            time_budget = request.form.get('time_budget', 5, type=float)
+            if not 0 < time_budget <= app.config['PORTFOLIO_MAX_SECONDS']:
+                flash(f"The search time must be more than 0 and at most {app.config['PORTFOLIO_MAX_SECONDS']} seconds.", 'danger')
+                return redirect(url_for('display_gantt_chart'))
+            if in_background():
+                job = start_job('optimize_resource_schedule', time_budget, keep=True, workers=min(4, os.cpu_count() or 1))
+                return redirect(url_for('job_wait', job_id=job.id, next=url_for('display_gantt_chart', starts='planned')))
+            result = project_app.optimize_resource_schedule(time_budget, workers=min(4, os.cpu_count() or 1))
+        else:
+            result = project_app.schedule_with_resources(method, rule)
+        flash(f"Resource-constrained schedule finishes on day {result.makespan} "
+              f"(day {project_app.get_schedule().project_finish} without resource limits).", 'success')
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('display_gantt_chart'))
+    return redirect(url_for('display_gantt_chart', starts='planned'))
 
 @app.route('/display_aoa')
 def display_aoa():
-    return render_template('display_graph.html', graph_url=url_for('static', filename='aoa_graph.png'))
+    return show_chart('display_graph.html', 'aoa_graph')
 
 @app.route('/display_aon')
 def display_aon():
-    return render_template('display_graph.html', graph_url=url_for('static', filename='aon_graph.png'))
+    return show_chart('display_graph.html', 'aon_graph')
 
 @app.route('/display_duration_vs_resources')
 def display_duration_vs_resources():
-    return render_template('display_graph.html', graph_url=url_for('static', filename='duration_vs_resources.png'))
+    return show_chart('display_graph.html', 'duration_vs_resources')
 
 @app.route('/display_gantt_chart')
 def display_gantt_chart():
-    return render_template('gantt_chart.html', graph_url=url_for('static', filename='sequence_of_events.png'))
+    # starts=planned shows the resource-constrained plan instead of the early starts
+    return show_chart('gantt_chart.html', 'sequence_of_events', {'planned': request.args.get('starts') == 'planned'},
+                      max_time_budget=app.config['PORTFOLIO_MAX_SECONDS'])
 
 @app.route('/display_resource_smoothing')
 def display_resource_smoothing():
     # Render the Gantt chart and provide the adjust activity form
-    return render_template('display_resource_smoothing.html', graph_url=url_for('static', filename='resource_smoothing_gantt_chart.png'))
+    return show_chart('display_resource_smoothing.html', 'resource_smoothing_gantt_chart')
 
 @app.route('/show_critical_path')
 def show_critical_path():
+    if not project_app.has_schedule() and in_background():
+        return wait_for(start_job('get_schedule', keep=True), request.full_path)
     critical_path_data = project_app.calculate_critical_path()
-    return render_template('critical_path.html', data=critical_path_data)
+    critical_paths = project_app.get_critical_paths()
+    near_critical_paths = project_app.get_near_critical_paths(k=10)
+    return render_template('critical_path.html', data=critical_path_data, critical_paths=critical_paths, near_critical_paths=near_critical_paths)
 
 @app.route('/clear_session')
 def clear_session():
     session.pop('filename', None)
+    projects.discard(session['project_id'])
     return redirect(url_for('home'))
 
 @app.route('/adjust_activity', methods=['POST'])
@@ -162,8 +343,6 @@ def adjust_activity():
     try:
         message = project_app.adjust_non_critical_path_activity(activity_name, new_start_time)
         flash(message, 'success')
-        # Regenerate the resource leveling Gantt chart with adjusted start times
-        project_app.plot_resource_smoothing('static/resource_smoothing_gantt_chart.png')
     except ValueError as e:
         flash(str(e), 'danger')
 
@@ -195,17 +374,65 @@ def generate_s_curve():
                 except ValueError:
                     pass  # Handle invalid inputs gracefully
 
-        # Plot S-curve with updated cash injections
-        project_app.plot_Scurve()
+        # The S-curve page plots the updated cash injections
         return redirect(url_for('display_s_curve'))
 
-    # Generate the initial S-curve
-    project_app.plot_Scurve()
     return render_template('s_curve.html', cash_injections=project_app.cash_injections)
 
+@app.route('/cash_constrained_schedule', methods=['POST'])
+def cash_constrained_schedule():
+    try:
+        result = project_app.schedule_within_cash()
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('generate_s_curve'))
+
+    flash(f"Activities delayed to stay within the cash injections: the project now finishes on day {result.makespan}.", 'success')
+    return redirect(url_for('display_s_curve'))
+
+@app.route('/s_curve_data')
+def s_curve_data():
+    granularity = request.args.get('granularity', 'day')
+    pending = pending_data()
+    if pending:
+        return pending
+    try:
+        profile = project_app.get_cost_profile(granularity)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    data = profile.as_dict()
+    if request.args.get('by_resource') == '0':
+        # The total is all the S-curve needs; the breakdown is one series per resource type
+        del data['by_resource']
+    data['cash_injections'] = [[time_point, project_app.cash_injections[time_point]] for time_point in sorted(project_app.cash_injections)]
+    return jsonify(data)
+
+@app.route('/simulation_data')
+def simulation_data():
+    iterations = request.args.get('iterations', 10000, type=int)
+    seed = request.args.get('seed', type=int)
+    if not 1 <= iterations <= app.config['SIMULATION_MAX_ITERATIONS']:
+        return jsonify({'error': f"Iterations must be between 1 and {app.config['SIMULATION_MAX_ITERATIONS']}."}), 400
+    # Runs bigger than the default run over a background-sized project go to
+    # the job pool: 202 with the job's status until it is done, then the
+    # result from the finished job, which the same request finds again
+    if iterations * len(project_app.activities) >= 10000 * app.config['BACKGROUND_MIN_ACTIVITIES']:
+        job = start_job('simulate_schedule', iterations=iterations, seed=seed)
+        if job.state == 'failed':
+            return jsonify({'error': job.error}), 400
+        if job.state != 'done':
+            return jsonify(job.status()), 202
+        return jsonify(job.result()[0].as_dict())
+    try:
+        result = project_app.simulate_schedule(iterations=iterations, seed=seed)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result.as_dict())
+
 @app.route('/display_s_curve')
 def display_s_curve():
-    return render_template('display_graph.html', graph_url=url_for('static', filename='s_curve.png'))
+    return show_chart('display_graph.html', 's_curve')
 
 @app.route('/adjust_crash_budget', methods=['POST'])
 def adjust_crash_budget():
@@ -215,78 +442,180 @@ def adjust_crash_budget():
         flash("Invalid budget! Please enter a positive number.", 'danger')
         return redirect(url_for('display_crashing'))
 
-    # Apply the crash budget and regenerate the Gantt chart
-    project_app.crash_activities_until_irreducible_path(crash_budget)
-    critical_path_data = project_app.calculate_critical_path()
-    project_app.plot_sequence_of_events(critical_path_data['critical_path'], before_smoothing=True)
+    # The crashing page plots the crashed schedule for this budget; the
+    # project itself stays uncrashed, so every budget is measured from the
+    # same starting point. The crash curve of a large project is solved by
+    # a background job first
+    if not project_app.has_crash_curve() and in_background():
+        job = start_job('get_crash_curve', keep=True)
+        return redirect(url_for('job_wait', job_id=job.id, next=url_for('display_crashing', budget=crash_budget)))
+    try:
+        plan = project_app.get_crash_plan(crash_budget)
+    except ValueError:
+        # The crashing page flashes why this project cannot be crashed
+        return redirect(url_for('display_crashing'))
+
+    flash(f"Crash budget of ${crash_budget} applied: {plan['project_duration']} days for ${plan['crash_cost']:.2f}.", 'success')
+    return redirect(url_for('display_crashing', budget=crash_budget))
+
+@app.route('/crash_curve_data')
+def crash_curve_data():
+    try:
+        curve = project_app.get_crash_curve()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(curve.as_dict())
+
+@app.route('/crash_plan_data')
+def crash_plan_data():
+    crash_budget = request.args.get('budget', type=float)
+    if crash_budget is None or crash_budget < 0:
+        return jsonify({'error': "Invalid budget! Please enter a non-negative number."}), 400
+    try:
+        plan = project_app.get_crash_plan(crash_budget)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(plan)
+
+def pending_data(crash_curve=False):
+    # While a large project's schedule (or crash curve) is being solved in
+    # the background, data routes answer 202 with the job's status; the
+    # client follows /jobs/<id> and asks again once it is done
+    if crash_curve and not project_app.has_crash_curve() and in_background():
+        job = start_job('get_crash_curve', keep=True)
+    elif not project_app.has_schedule() and in_background():
+        job = start_job('get_schedule', keep=True)
+    else:
+        return None
+    return jsonify(job.status()), 202
+
+@app.route('/schedule_data')
+def schedule_data():
+    pending = pending_data()
+    if pending:
+        return pending
+    try:
+        data = project_app.get_schedule_data()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(data)
+
+@app.route('/gantt_data')
+def gantt_data():
+    # starts=planned for the adjusted or resource-constrained starts, budget
+    # for the crashed schedule of that crash budget
+    crash_budget = request.args.get('budget', 0, type=float)
+    if crash_budget < 0:
+        return jsonify({'error': "Invalid budget! Please enter a non-negative number."}), 400
+    pending = pending_data(crash_curve=bool(crash_budget))
+    if pending:
+        return pending
+    try:
+        data = project_app.get_gantt_data(planned=request.args.get('starts') == 'planned', crash_budget=crash_budget or None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(data)
+
+@app.route('/resource_histogram_data')
+def resource_histogram_data():
+    pending = pending_data()
+    if pending:
+        return pending
+    try:
+        histogram = project_app.get_resource_histogram()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(histogram.as_steps(project_app.get_resource_capacities()))
 
-    flash(f"Crash budget of ${crash_budget} applied.", 'success')
-    return redirect(url_for('display_crashing'))
+@app.route('/schedule_view')
+def schedule_view():
+    # Gantt chart, resource histogram and S-curve drawn in the browser from
+    # the data routes above, so they can be zoomed at any project size
+    return render_template('schedule_view.html')
 
 @app.route('/display_crashing')
 def display_crashing():
-    return render_template('display_crashing.html', graph_url=url_for('static', filename='sequence_of_events.png'))
+    budget = request.args.get('budget', 0, type=float)
+    if not project_app.has_crash_curve() and in_background():
+        return wait_for(start_job('get_crash_curve', keep=True), request.full_path)
+    try:
+        max_budget = project_app.get_crash_curve().costs[-1]
+    except ValueError as e:
+        flash(str(e), 'danger')
+        max_budget = budget = 0
+    return show_chart('display_crashing.html', 'sequence_of_events', {'crash_budget': budget or None},
+                      max_budget=max_budget, budget=budget)
+
+@app.route('/charts/<name>')
+def chart_image(name):
+    # Chart names are content hashes, so an image never changes once written:
+    # the hash is a strong ETag and browsers may keep the image indefinitely
+    response = send_from_directory(app.config['CHART_FOLDER'], name, etag=name.rsplit('.', 1)[0], max_age=31536000)
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': "Unknown job."}), 404
+    return jsonify(job.status())
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    # Server-sent events: the job's status once a second until it finishes
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': "Unknown job."}), 404
+
+    def stream():
+        while True:
+            status = job.status()
+            yield f"data: {json.dumps(status)}\n\n"
+            if status['state'] in ('done', 'failed'):
+                return
+            time.sleep(1)
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/jobs/<job_id>/wait')
+def job_wait(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return redirect(url_for('home'))
+    return wait_for(job, request.args.get('next'))
 
 
 def process_excel(filepath):
-    df = pd.read_excel(filepath)
-    df.columns = df.columns.str.strip()
-    required_columns = ['Activity', 'Duration', 'Resources', 'Predecessors', 'Resources per unit cost', 'crash duration', 'crash cost', 'deadline']
-
-    # Check for required columns
-    for column in required_columns:
-        if column not in df.columns:
-            raise ValueError(f"Missing required column: {column}")
-
-    for index, row in df.iterrows():
-        name = row['Activity'].strip()
-        duration = int(row['Duration'])
-
-        # Parse resources
-        resources_str = str(row['Resources']).strip()
-        resources = {}
-        if resources_str.lower() != 'none':
-            resource_items = resources_str.split(',')
-            for item in resource_items:
-                try:
-                    k, v = item.split(':')
-                    resources[k.strip()] = int(v.strip())
-                except ValueError:
-                    print(f"Skipping invalid resource entry: {item}")
-
-        # Parse predecessors
-        predecessors_str = str(row['Predecessors']).strip()
-        predecessors = []
-        if predecessors_str.lower() != 'none':
-            predecessors = [pred.strip() for pred in predecessors_str.split(',')]
-
-        # Parse cost per unit
-        resources_per_unit_cost = {}
-        for resource in resources:
-            cost_col = f'Cost per Unit of {resource}'
-            if cost_col in df.columns:
-                resources_per_unit_cost[resource] = float(row[cost_col])
-            else:
-                # If cost is not specified, set a default value or
-                # If cost is not specified, set a default value or raise a warning
-                resources_per_unit_cost[resource] = 0
-                print(f"Warning: Missing cost per unit for resource '{resource}' in activity '{name}'.")
-
-        # Calculate total cost
-        total_cost = sum(resources[resource] * resources_per_unit_cost.get(resource, 0) for resource in resources)
-
-        # Debugging output to verify calculations
-        print(f"Activity: {name}")
-        print(f"Resources: {resources}")
-        print(f"Resources per unit cost: {resources_per_unit_cost}")
-        print(f"Total cost calculated: {total_cost}\n")
-
-        crash_duration = int(row['crash duration'])
-        crash_cost = float(row['crash cost'])
-        deadline = int(row['deadline']) if not pd.isna(row['deadline']) else None
-
-        # Add activity with validated data
-        project_app.add_activity(name, duration, resources, predecessors, resources_per_unit_cost, total_cost, crash_duration, crash_cost, deadline)
+    upload = uploads.load(filepath)
+
+    # The whole network was checked once, when the file was first parsed
+    report = upload.report
+    if not report.ok:
+        project_app.validation_report = report
+        return report
+
+    # A valid upload replaces the session's project instead of adding to it
+    projects.reset(g.project_entry)
+    project_app.validation_report = report
+
+    project_app.load_activities(own_rows(upload), report.network)
+    return report
+
+def update_excel(filepath):
+    # Re-upload of a revised schedule: only the differences are applied to the
+    # session's project. Returns the report and the (added, removed, changed)
+    # activity names, or None when the file was rejected
+    upload = uploads.load(filepath)
+    report = upload.report
+    project_app.validation_report = report
+    if not report.ok:
+        return report, None
+    return report, project_app.update_activities(own_rows(upload))
+
+def own_rows(upload):
+    # The parsed rows are shared by every session that uploads this file, so
+    # each project gets its own copies of the resource dicts
+    return [row[:2] + (dict(row[2]), row[3], dict(row[4])) + row[5:] for row in upload.rows]
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,300 @@
+import numpy as np
+
+from backend.cpm import Schedule
+
+
+def _csr(keys, values, size):
+    # Group values by key: values[ptr[k]:ptr[k + 1]] belong to key k
+    ptr, order = _csr_order(keys, size)
+    return ptr, values[order]
+
+
+def _csr_order(keys, size):
+    order = np.argsort(keys, kind='stable')
+    ptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=ptr[1:])
+    return ptr, order
+
+
+def _expand(starts, counts):
+    # Concatenate the ranges starts[i]:starts[i] + counts[i]
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.arange(counts.sum()) - offsets + np.repeat(starts, counts)
+
+
+class ArrayNetwork:
+    # Compressed sparse row form of the precedence network for very large
+    # projects. Nodes are renumbered so that every topological level is a
+    # contiguous block, which makes the predecessor (and successor) edges of a
+    # whole level one contiguous slice that numpy can reduce in a single call.
+    # kinds and lags, when given, hold the relation type and lag of each edge.
+    def __init__(self, names, durations, sources, targets, kinds=None, lags=None):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.durations = np.asarray(durations)
+        size = len(self.names)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        self.edge_count = len(sources)
+
+        # Peel off topological levels (Kahn's algorithm, one frontier at a time)
+        succ_ptr, succ_idx = _csr(sources, targets, size)
+        remaining = np.bincount(targets, minlength=size)
+        frontier = np.flatnonzero(remaining == 0)
+        levels = []
+        while frontier.size:
+            levels.append(frontier)
+            starts = succ_ptr[frontier]
+            reached = succ_idx[_expand(starts, succ_ptr[frontier + 1] - starts)]
+            if not reached.size:
+                break
+            nodes, counts = np.unique(reached, return_counts=True)
+            remaining[nodes] -= counts
+            frontier = nodes[remaining[nodes] == 0]
+
+        # order maps level-sorted position -> original node, rank the inverse
+        self.order = np.concatenate(levels) if levels else np.zeros(0, dtype=np.int64)
+        if len(self.order) != size:
+            raise ValueError("The precedence network contains a cycle.")
+        self.rank = np.empty(size, dtype=np.int64)
+        self.rank[self.order] = np.arange(size)
+        self.level_ptr = np.zeros(len(levels) + 1, dtype=np.int64)
+        np.cumsum([len(level) for level in levels], out=self.level_ptr[1:])
+
+        sources, targets = self.rank[sources], self.rank[targets]
+        self.pred_ptr, pred_order = _csr_order(targets, size)
+        self.succ_ptr, succ_order = _csr_order(sources, size)
+        self.pred_idx, self.succ_idx = sources[pred_order], targets[succ_order]
+
+        # Typed or lagged links: per edge, whether it runs from the start of
+        # the predecessor and to the finish of the successor, and its lag, in
+        # both edge orders, plus the node whose row the edge is stored in
+        self.linked = kinds is not None and (lags is not None and np.any(lags) or any(kind != 'FS' for kind in kinds))
+        if self.linked:
+            kinds = np.asarray(kinds)
+            lags = np.zeros(len(sources)) if lags is None else np.asarray(lags)
+            from_start, to_finish = np.char.startswith(kinds, 'S'), np.char.endswith(kinds, 'F')
+            self.pred_links = (from_start[pred_order], to_finish[pred_order], lags[pred_order], targets[pred_order])
+            self.succ_links = (from_start[succ_order], to_finish[succ_order], lags[succ_order], sources[succ_order])
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def level_count(self):
+        return len(self.level_ptr) - 1
+
+    @classmethod
+    def from_compiled(cls, network):
+        # Keep the CompiledNetwork numbering so results line up with it
+        counts = [len(preds) for preds in network.preds]
+        targets = np.repeat(np.arange(len(network), dtype=np.int64), counts)
+        sources = np.fromiter((pred for preds in network.preds for pred in preds),
+                              dtype=np.int64, count=sum(counts))
+        if not network.linked:
+            return cls(network.names, network.durations, sources, targets)
+        links = [link for node, preds in enumerate(network.preds)
+                 for link in (network.pred_links[node] or [('FS', 0)] * len(preds))]
+        kinds, lags = zip(*links) if links else ((), ())
+        return cls(network.names, network.durations, sources, targets, list(kinds), list(lags))
+
+
+def _column(values, like):
+    # Per-edge values, broadcast against an (edges x scenarios) block if need be
+    return values if like.ndim == 1 else values[:, None]
+
+
+def _start_bounds(network, start, finish, duration, edges):
+    # Earliest start of the successor allowed by each predecessor edge
+    from_start, to_finish, lag, owner = (values[edges] for values in network.pred_links)
+    pred = network.pred_idx[edges]
+    bounds = np.where(_column(from_start, start), start[pred], finish[pred]) + _column(lag, start)
+    return bounds - _column(to_finish, start) * duration[owner]
+
+
+def _finish_bounds(network, start, finish, duration, edges):
+    # Latest finish of the predecessor allowed by each successor edge
+    from_start, to_finish, lag, owner = (values[edges] for values in network.succ_links)
+    succ = network.succ_idx[edges]
+    bounds = np.where(_column(to_finish, start), finish[succ], start[succ]) - _column(lag, start)
+    return bounds + _column(from_start, start) * duration[owner]
+
+
+def _link_gaps(network, early_start, early_finish):
+    # Free float of every successor edge: the successor's early time less
+    # what the link requires of it
+    from_start, to_finish, lag, owner = network.succ_links
+    succ = network.succ_idx
+    after = np.where(_column(to_finish, early_start), early_finish[succ], early_start[succ]) - _column(lag, early_start)
+    return after - np.where(_column(from_start, early_start), early_start[owner], early_finish[owner])
+
+
+def _dtype(network, duration):
+    # Lags may be fractional even when every duration is a whole number
+    return np.result_type(duration, network.pred_links[2]) if network.linked else duration.dtype
+
+
+class ArraySchedule(Schedule):
+    # Schedule whose quantities are numpy arrays in original node order
+
+    def critical_nodes(self):
+        order = self.network.order
+        return order[self.total_float[order] <= 0].tolist()
+
+    def by_name(self, values):
+        order = self.network.order
+        names = self.network.names
+        return dict(zip((names[node] for node in order.tolist()), values[order].tolist()))
+
+
+def compute_array_schedule(network, durations=None, deadlines=None):
+    # Level-by-level CPM: each level's early starts are one maximum.reduceat
+    # over the early finishes of its predecessors, and each level's late
+    # finishes one minimum.reduceat over the late starts of its successors
+    size = len(network)
+    rank = network.rank
+    if durations is None:
+        durations = network.durations
+    duration = np.asarray(durations)[network.order]
+    level_ptr = network.level_ptr
+    pred_ptr, pred_idx = network.pred_ptr, network.pred_idx
+    succ_ptr, succ_idx = network.succ_ptr, network.succ_idx
+
+    duration = duration.astype(_dtype(network, duration), copy=False)
+    early_start = np.zeros(size, dtype=duration.dtype)
+    early_finish = duration.copy()
+    for level in range(1, network.level_count):
+        first, last = level_ptr[level], level_ptr[level + 1]
+        ptr = pred_ptr[first:last]
+        # Every node past level 0 has at least one predecessor, so no segment is empty
+        if network.linked:
+            bounds = _start_bounds(network, early_start, early_finish, duration, slice(ptr[0], pred_ptr[last]))
+            early_start[first:last] = np.maximum(np.maximum.reduceat(bounds, ptr - ptr[0]), 0)
+        else:
+            early_start[first:last] = np.maximum.reduceat(early_finish[pred_idx[ptr[0]:pred_ptr[last]]], ptr - ptr[0])
+        early_finish[first:last] = early_start[first:last] + duration[first:last]
+
+    project_finish = early_finish.max() if size else 0
+    cap = None
+    capped = [(network.index[name], deadline) for name, deadline in (deadlines or {}).items()
+              if deadline is not None and name in network.index]
+    if capped:
+        nodes, values = (np.asarray(column) for column in zip(*capped))
+        cap = np.full(size, project_finish, dtype=np.result_type(duration, values))
+        cap[rank[nodes]] = np.minimum(values, project_finish)
+
+    late_finish = np.full(size, project_finish, dtype=early_finish.dtype if cap is None else cap.dtype)
+    late_start = np.zeros(size, dtype=late_finish.dtype)
+    for level in range(network.level_count - 1, -1, -1):
+        first, last = level_ptr[level], level_ptr[level + 1]
+        ptr = succ_ptr[first:last]
+        has_succ = succ_ptr[first + 1:last + 1] > ptr
+        if has_succ.any():
+            block = late_finish[first:last]
+            if network.linked:
+                bounds = _finish_bounds(network, late_start, late_finish, duration, slice(ptr[0], succ_ptr[last]))
+                block[has_succ] = np.minimum(np.minimum.reduceat(bounds, ptr[has_succ] - ptr[0]), project_finish)
+            else:
+                block[has_succ] = np.minimum.reduceat(late_start[succ_idx[ptr[0]:succ_ptr[last]]], ptr[has_succ] - ptr[0])
+        if cap is not None:
+            np.minimum(late_finish[first:last], cap[first:last], out=late_finish[first:last])
+        late_start[first:last] = late_finish[first:last] - duration[first:last]
+
+    # Floats for every node at once
+    total_float = late_finish - early_finish
+    free_float = _free_float(network, early_start, early_finish, project_finish)
+    has_pred = np.diff(pred_ptr) > 0
+    prior_finish = np.zeros(size, dtype=late_finish.dtype)
+    if has_pred.any():
+        if network.linked:
+            bounds = _start_bounds(network, late_start, late_finish, duration, slice(None))
+            prior_finish[has_pred] = np.maximum(np.maximum.reduceat(bounds, pred_ptr[:-1][has_pred]), 0)
+        else:
+            prior_finish[has_pred] = np.maximum.reduceat(late_finish[pred_idx], pred_ptr[:-1][has_pred])
+    independent_float = np.maximum(free_float + early_start - prior_finish, 0)
+    interfering_float = total_float - free_float
+
+    return ArraySchedule(network, early_start[rank], early_finish[rank], late_start[rank], late_finish[rank],
+                         total_float[rank], free_float[rank], interfering_float[rank], independent_float[rank],
+                         project_finish.item() if size else 0)
+
+
+def _free_float(network, early_start, early_finish, project_finish):
+    # Smallest gap to any successor, or to the project finish for a sink;
+    # works on one schedule or on an (activities x scenarios) block
+    succ_ptr = network.succ_ptr
+    has_succ = np.diff(succ_ptr) > 0
+    if network.linked:
+        free_float = project_finish - early_finish
+        if has_succ.any():
+            gaps = np.minimum.reduceat(_link_gaps(network, early_start, early_finish), succ_ptr[:-1][has_succ], axis=0)
+            free_float[has_succ] = np.minimum(free_float[has_succ], gaps)
+        return free_float
+    next_start = np.broadcast_to(project_finish, early_start.shape).astype(early_start.dtype)
+    if has_succ.any():
+        next_start[has_succ] = np.minimum.reduceat(early_start[network.succ_idx], succ_ptr[:-1][has_succ], axis=0)
+    return next_start - early_finish
+
+
+class BatchSchedule:
+    # CPM results for many duration scenarios at once. project_finish has one
+    # entry per scenario; the per-activity arrays are scenarios x activities
+    # in original node order and are only filled when floats were requested.
+    def __init__(self, network, project_finish, early_start=None, total_float=None, free_float=None):
+        self.network = network
+        self.project_finish = project_finish
+        self.early_start = early_start
+        self.total_float = total_float
+        self.free_float = free_float
+
+    def criticality(self):
+        # Share of scenarios in which each activity has no total float
+        return (self.total_float <= 0).mean(axis=0)
+
+
+def compute_batch_schedule(network, durations, floats=False):
+    # The level-by-level passes of compute_array_schedule with a scenario axis:
+    # every reduceat works on a (level nodes x scenarios) block at once
+    durations = np.asarray(durations)
+    if durations.ndim != 2 or durations.shape[1] != len(network):
+        raise ValueError(f"Expected a scenarios x {len(network)} duration matrix, got shape {durations.shape}.")
+    rank = network.rank
+    level_ptr = network.level_ptr
+    pred_ptr, pred_idx = network.pred_ptr, network.pred_idx
+    duration = np.ascontiguousarray(durations[:, network.order].T)
+    duration = duration.astype(_dtype(network, duration), copy=False)
+
+    early_start = np.zeros_like(duration)
+    early_finish = duration.copy()
+    for level in range(1, network.level_count):
+        first, last = level_ptr[level], level_ptr[level + 1]
+        ptr = pred_ptr[first:last]
+        if network.linked:
+            bounds = _start_bounds(network, early_start, early_finish, duration, slice(ptr[0], pred_ptr[last]))
+            early_start[first:last] = np.maximum(np.maximum.reduceat(bounds, ptr - ptr[0], axis=0), 0)
+        else:
+            early_start[first:last] = np.maximum.reduceat(early_finish[pred_idx[ptr[0]:pred_ptr[last]]], ptr - ptr[0], axis=0)
+        early_finish[first:last] = early_start[first:last] + duration[first:last]
+    project_finish = early_finish.max(axis=0) if len(network) else np.zeros(len(durations), dtype=duration.dtype)
+    if not floats:
+        return BatchSchedule(network, project_finish)
+
+    succ_ptr, succ_idx = network.succ_ptr, network.succ_idx
+    late_start = np.zeros_like(duration)
+    late_finish = np.broadcast_to(project_finish, duration.shape).copy()
+    for level in range(network.level_count - 1, -1, -1):
+        first, last = level_ptr[level], level_ptr[level + 1]
+        ptr = succ_ptr[first:last]
+        has_succ = succ_ptr[first + 1:last + 1] > ptr
+        if has_succ.any():
+            rows = first + np.flatnonzero(has_succ)
+            if network.linked:
+                bounds = _finish_bounds(network, late_start, late_finish, duration, slice(ptr[0], succ_ptr[last]))
+                late_finish[rows] = np.minimum(np.minimum.reduceat(bounds, ptr[has_succ] - ptr[0], axis=0), project_finish)
+            else:
+                late_finish[rows] = np.minimum.reduceat(late_start[succ_idx[ptr[0]:succ_ptr[last]]], ptr[has_succ] - ptr[0], axis=0)
+        late_start[first:last] = late_finish[first:last] - duration[first:last]
+
+    total_float = late_finish - early_finish
+    free_float = _free_float(network, early_start, early_finish, project_finish)
+    return BatchSchedule(network, project_finish, early_start[rank].T, total_float[rank].T, free_float[rank].T)
@@ -1,3 +1,6 @@
+import copy
+import hashlib
+import pickle
 import networkx as nx
 import matplotlib.pyplot as plt
 from collections import defaultdict
@@ -6,124 +9,410 @@ matplotlib.use('Agg')  # Use the Agg backend for non-interactive rendering
 import matplotlib.pyplot as plt
 import numpy as np
 
+from backend.array_cpm import ArrayNetwork, ArraySchedule, compute_array_schedule, compute_batch_schedule
+from backend.cashflow import cash_constrained_schedule
+from backend.costs import cost_profile
+from backend.crashing import solve_time_cost_tradeoff
+from backend.cpm import ScheduleSnapshot, compute_schedule, rebase_schedule, update_schedule
+from backend.leveling import level_schedule
+from backend.network import PLAIN_LINK, CompiledNetwork, as_link
+from backend.paths import critical_paths, near_critical_paths
+from backend.portfolio import search_schedule
+from backend.rcpsp import resource_constrained_schedule
+from backend.resources import resource_histogram
+from backend.simulation import PertSampler, simulate
+
+# Projects at least this large are scheduled with the numpy engine
+ARRAY_ENGINE_MIN_ACTIVITIES = 50000
+
 
 class ProjectManagementApp:
     def __init__(self):
         self.activities = {}
         self.predecessors = {}
+        self.links = {}  # (predecessor, activity) -> (type, lag) for links other than plain finish-to-start
         self.deadlines = {}
         self.adjusted_start_times = {}
         self.max_resources = 10
         self.resources_timeline = defaultdict(int)
         self.cash_injections = {}
+        self._network = None
+        self._array_network = None
+        self._schedule = None
+        self._snapshot = None
+        self._crash_curve = None
+        self.validation_report = None  # ValidationReport of the last upload
+        self._derived = {}
+        self._derived_version = None
+        self.version = 0
+
+    def add_activity(self, name, duration, resources, predecessors, resources_per_unit_cost, total_cost, crash_duration, crash_cost, deadline=None,
+                     optimistic=None, most_likely=None, pessimistic=None):
+        # Three-point estimates are optional and only used by simulate_schedule.
+        # Predecessors are names (finish-to-start) or (name, type, lag) links
+        links = [as_link(entry) for entry in predecessors]
+        estimates = None
+        if optimistic is not None or most_likely is not None or pessimistic is not None:
+            if optimistic is None or most_likely is None or pessimistic is None:
+                raise ValueError(f"Activity '{name}' needs all three of optimistic, most likely and pessimistic durations.")
+            if not optimistic <= most_likely <= pessimistic:
+                raise ValueError(f"Activity '{name}' estimates must satisfy optimistic <= most likely <= pessimistic.")
+            estimates = (optimistic, most_likely, pessimistic)
 
-    def add_activity(self, name, duration, resources, predecessors, resources_per_unit_cost, total_cost, crash_duration, crash_cost, deadline=None):
         self.activities[name] = {
             'duration': duration,
             'resources': resources,
             'resources_per_unit_cost': resources_per_unit_cost,
             'total_cost': total_cost,
             'crash_duration': crash_duration,
-            'crash_cost': crash_cost
+            'crash_cost': crash_cost,
+            'estimates': estimates
         }
         self.deadlines[name] = deadline
         if name not in self.predecessors:
             self.predecessors[name] = set()
-        self.predecessors[name].update(predecessors)
-
-    def get_start_time(self, node):
-        # Use adjusted start time if available
-        return self.adjusted_start_times.get(node, self.calculate_earliest_start_times().get(node, 0))
-
-    def calculate_earliest_start_times(self):
-        aon_graph = nx.DiGraph()
-
-        for activity, preds in self.predecessors.items():
-            for pred in preds:
-                aon_graph.add_edge(pred, activity)
+        for pred, kind, lag in links:
+            self.predecessors[name].add(pred)
+            if (kind, lag) == PLAIN_LINK:
+                self.links.pop((pred, name), None)
+            else:
+                self.links[(pred, name)] = (kind, lag)
+        self._invalidate(structure=True)
+
+    def load_activities(self, rows, network=None):
+        # Bulk add_activity for a parsed upload. rows are add_activity
+        # argument tuples ending in a dict of three-point estimates; network,
+        # when compiled from the same rows, is adopted instead of rebuilt
+        for name, duration, resources, predecessors, resources_per_unit_cost, total_cost, crash_duration, crash_cost, deadline, estimates in rows:
+            self.add_activity(name, duration, resources, predecessors, resources_per_unit_cost, total_cost, crash_duration, crash_cost, deadline, **estimates)
+        if network is not None and network.names == list(self.activities):
+            self._network = network.copy()
+
+    def update_activities(self, rows):
+        # Re-upload of a revised schedule: diff rows (as for load_activities)
+        # against the model by activity name and apply only what changed.
+        # An activity's links are replaced rather than added to, removed
+        # activities take their links and adjusted starts with them, and a
+        # cached schedule is re-timed around the changes instead of rebuilt.
+        # Returns the (added, removed, changed) activity names
+        network, array_network, schedule, crash_curve = self._network, self._array_network, self._schedule, self._crash_curve
+        names = {row[0] for row in rows}
+        removed = [name for name in self.activities if name not in names]
+        added, changed = [], []
+        retimed = set()  # activities whose duration or links changed
+        touched = set()  # other ends of added or removed links
+        structure = bool(removed)
+        for name in removed:
+            touched.update(self.predecessors.pop(name))
+            del self.activities[name]
+            self.deadlines.pop(name, None)
+            self.adjusted_start_times.pop(name, None)
+        if removed:
+            gone = set(removed)
+            self.links = {key: link for key, link in self.links.items() if key[0] not in gone and key[1] not in gone}
+
+        for row in rows:
+            name, duration, resources, predecessors, resources_per_unit_cost, total_cost, crash_duration, crash_cost, deadline, estimates = row
+            links = {}
+            for entry in predecessors:
+                pred, kind, lag = as_link(entry)
+                links[pred] = (kind, lag)
+            old = self.activities.get(name)
+            if old is None:
+                added.append(name)
+                retimed.add(name)
+                structure = True
+                touched.update(links)
+                self.add_activity(name, duration, resources, predecessors, resources_per_unit_cost, total_cost, crash_duration, crash_cost, deadline, **estimates)
+                continue
 
-        topo_sort = list(nx.topological_sort(aon_graph))
+            old_preds = self.predecessors[name]
+            relinked = links.keys() != old_preds or any(self.links.get((pred, name), PLAIN_LINK) != link for pred, link in links.items())
+            estimate = tuple(estimates.get(key) for key in ('optimistic', 'most_likely', 'pessimistic')) if estimates else None
+            if not relinked and deadline == self.deadlines.get(name) and (duration, resources, resources_per_unit_cost, total_cost, crash_duration, crash_cost, estimate) == (
+                    old['duration'], old['resources'], old['resources_per_unit_cost'], old['total_cost'], old['crash_duration'], old['crash_cost'], old['estimates']):
+                continue
+            changed.append(name)
+            if relinked:
+                structure = True
+                touched.update(old_preds)
+                touched.update(links)
+                for pred in old_preds:
+                    self.links.pop((pred, name), None)
+                self.predecessors[name] = set()
+            if relinked or duration != old['duration']:
+                retimed.add(name)
+            self.add_activity(name, duration, resources, predecessors, resources_per_unit_cost, total_cost, crash_duration, crash_cost, deadline, **estimates)
+
+        # add_activity dropped the cached network and schedule; put them back
+        # and invalidate only as far as the changes reach
+        self._network, self._array_network, self._schedule, self._crash_curve = network, array_network, schedule, crash_curve
+        if structure:
+            self._invalidate(structure=True)
+            if schedule is not None and not isinstance(schedule, ArraySchedule):
+                network = self.get_network()
+                seeds = [network.index[name] for name in retimed.union(touched) if name in network.index]
+                self._schedule = rebase_schedule(schedule, network, seeds)
+        elif retimed:
+            self._invalidate()
+            if network is not None:
+                for name in retimed:
+                    network.set_duration(name, self.activities[name]['duration'])
+                if schedule is not None and not isinstance(schedule, ArraySchedule):
+                    self._schedule = schedule
+                    update_schedule(schedule, [network.index[name] for name in retimed])
+        elif changed:
+            self._invalidate()
+
+        # Manual starts of changed activities are dropped, and so are any that
+        # the revised predecessors no longer allow
+        for name in changed:
+            self.adjusted_start_times.pop(name, None)
+        if self.adjusted_start_times:
+            early_start = self.calculate_earliest_start_times()
+            self.adjusted_start_times = {name: start for name, start in self.adjusted_start_times.items() if start >= early_start[name]}
+        print(f"Updated project: {len(added)} added, {len(removed)} removed, {len(changed)} changed activities.")
+        return added, removed, changed
+
+    def _invalidate(self, structure=False):
+        # Drop derived schedule data; the compiled network itself is only
+        # rebuilt when activities or links were added
+        if structure:
+            self._network = None
+            self._array_network = None
+        self._schedule = None
+        self._crash_curve = None
+        self.version += 1
+
+    def _duration_changed(self, name):
+        # A cached list schedule is re-timed incrementally around the changed
+        # activity; an array schedule is simply recomputed on next use
+        self.version += 1
+        self._crash_curve = None
+        if self._network is None:
+            return
+        self._network.set_duration(name, self.activities[name]['duration'])
+        if self._schedule is not None and not isinstance(self._schedule, ArraySchedule):
+            update_schedule(self._schedule, [self._network.index[name]])
+        else:
+            self._schedule = None
+
+    def get_network(self):
+        # Compile the precedence network on first use; it is reused by every
+        # schedule calculation until add_activity changes the structure
+        if self._network is None:
+            self._network = CompiledNetwork(self.activities, self.predecessors, self.links)
+        return self._network
+
+    def get_array_network(self):
+        if self._array_network is None:
+            self._array_network = ArrayNetwork.from_compiled(self.get_network())
+        return self._array_network
+
+    def _compute_schedule(self, deadlines=None):
+        network = self.get_network()
+        if len(network) >= ARRAY_ENGINE_MIN_ACTIVITIES:
+            return compute_array_schedule(self.get_array_network(), network.durations, deadlines)
+        return compute_schedule(network, deadlines)
+
+    def get_schedule(self):
+        # Single forward/backward CPM pass, cached until the next edit
+        if self._schedule is None:
+            self._schedule = self._compute_schedule()
+        return self._schedule
+
+    def has_schedule(self):
+        return self._schedule is not None
+
+    def get_snapshot(self):
+        # Effective start times, rebuilt once per model version
+        if self._snapshot is None or self._snapshot.version != self.version:
+            self._snapshot = ScheduleSnapshot(self.get_schedule(), self.get_network().durations, self.adjusted_start_times, self.version)
+        return self._snapshot
+
+    def _cached(self, key, build):
+        # Memoise data derived from the schedule for the current model version
+        if self._derived_version != self.version:
+            self._derived = {}
+            self._derived_version = self.version
+        if key not in self._derived:
+            self._derived[key] = build()
+        return self._derived[key]
+
+    def fingerprint(self):
+        # Hash of everything the charts are drawn from. The model is hashed
+        # once per version; cash injections and resource limits are edited in
+        # place without a new version, so they are hashed on every call
+        model = self._cached('fingerprint', lambda: hashlib.sha256(pickle.dumps((
+            self.activities, {name: sorted(preds) for name, preds in self.predecessors.items()}, sorted(self.links.items()),
+            self.deadlines, self.adjusted_start_times), protocol=pickle.HIGHEST_PROTOCOL)).hexdigest())
+        settings = repr((sorted(self.cash_injections.items()), self.max_resources))
+        return hashlib.sha256((model + settings).encode()).hexdigest()
+
+    def get_cost_profile(self, granularity='day'):
+        return self._cached(('cost_profile', granularity),
+                            lambda: cost_profile(self.activities, self.get_snapshot(), granularity))
+
+    def get_resource_histogram(self):
+        return self._cached('resource_histogram', lambda: resource_histogram(self.activities, self.get_snapshot()))
+
+    def get_resource_capacities(self):
+        # max_resources is either one limit for every resource type or a
+        # per-type dict; types missing from the dict are unlimited
+        resource_types = {resource for activity in self.activities.values() for resource in activity['resources']}
+        if isinstance(self.max_resources, dict):
+            return {resource: self.max_resources.get(resource, float('inf')) for resource in resource_types}
+        return {resource: self.max_resources for resource in resource_types}
+
+    def evaluate_scenarios(self, scenarios, floats=False):
+        # What-if analysis without touching self.activities. scenarios is either
+        # a scenarios x activities duration matrix in get_network().names order
+        # or a list of {activity: duration} overrides of the current durations
+        network = self.get_network()
+        if isinstance(scenarios, np.ndarray):
+            matrix = scenarios
+        else:
+            matrix = np.tile(np.asarray(network.durations, dtype=float), (len(scenarios), 1))
+            for row, overrides in enumerate(scenarios):
+                for name, duration in overrides.items():
+                    if name not in network.index:
+                        raise ValueError(f"Unknown activity '{name}' in scenario {row}.")
+                    matrix[row, network.index[name]] = duration
+        return compute_batch_schedule(self.get_array_network(), matrix, floats)
+
+    def simulate_schedule(self, iterations=10000, seed=None, workers=1):
+        # Monte Carlo PERT run: completion-time distribution, P50/P80/P95 and
+        # the criticality index of every activity
+        sampler = PertSampler(self.get_network(), self.activities)
+        return simulate(self.get_array_network(), sampler, iterations, seed, workers)
+
+    def get_crash_curve(self):
+        # Least-cost project duration for every crash budget, from the current
+        # durations. Kept until a duration or link changes; moving an activity
+        # within its float does not affect it
+        if self._crash_curve is None:
+            self._crash_curve = solve_time_cost_tradeoff(self.get_network(), self.activities)
+        return self._crash_curve
+
+    def has_crash_curve(self):
+        return self._crash_curve is not None
+
+    def get_crash_plan(self, crash_budget):
+        # What a budget buys, read off the crash curve: which activities to
+        # crash and by how much. The model itself is not changed
+        project_duration, crash_cost, reductions = self.get_crash_curve().at_budget(crash_budget)
+        durations = {name: activity['duration'] - reductions.get(name, 0) for name, activity in self.activities.items()}
+        schedule = self._schedule_with_durations(durations)
+        return {
+            'budget': crash_budget,
+            'project_duration': project_duration,
+            'crash_cost': crash_cost,
+            'remaining_budget': crash_budget - crash_cost,
+            'reductions': reductions,
+            'durations': durations,
+            'critical_path': [schedule.network.names[node] for node in schedule.critical_nodes()]
+        }
 
-        earliest_start = {}
-        for node in topo_sort:
-            if not list(aon_graph.predecessors(node)):
-                earliest_start[node] = 0
+    def _schedule_with_durations(self, durations):
+        # What-if CPM pass over a copy of the network with other durations
+        network = copy.copy(self.get_network())
+        network.durations = [durations[name] for name in network.names]
+        return compute_schedule(network)
+
+    def get_schedule_data(self):
+        # The CPM result as one list per quantity, in topological order, for
+        # the JSON API: the names are sent once instead of once per field
+        def build():
+            schedule = self.get_schedule()
+            fields = ('early_start', 'early_finish', 'late_start', 'late_finish', 'total_float', 'free_float')
+            columns = {field: schedule.by_name(getattr(schedule, field)) for field in fields}
+            data = {'activities': list(columns['early_start'])}
+            data['duration'] = [self.activities[name]['duration'] for name in data['activities']]
+            data.update((field, list(values.values())) for field, values in columns.items())
+            data['critical'] = [int(total_float <= 0) for total_float in data['total_float']]
+            data['project_finish'] = schedule.project_finish
+            return data
+        return self._cached('schedule_data', build)
+
+    def get_gantt_data(self, planned=False, crash_budget=None):
+        # Gantt bars as lists sorted by start, like the PNG Gantt chart: the
+        # early starts, the adjusted or resource-constrained starts (planned)
+        # or the crashed schedule for crash_budget
+        def build():
+            if crash_budget:
+                durations = self.get_crash_plan(crash_budget)['durations']
+                schedule = self._schedule_with_durations(durations)
+                starts = schedule.by_name(schedule.early_start)
             else:
-                earliest_start[node] = max([earliest_start[pred] + self.activities[pred]['duration'] for pred in aon_graph.predecessors(node)])
+                durations = {name: activity['duration'] for name, activity in self.activities.items()}
+                schedule = self.get_schedule()
+                starts = self.get_snapshot().start_by_name if planned else schedule.by_name(schedule.early_start)
+            total_float = schedule.by_name(schedule.total_float)
+            names = sorted(starts, key=starts.get)
+            return {
+                'activities': names,
+                'start': [starts[name] for name in names],
+                'duration': [durations[name] for name in names],
+                'total_float': [total_float[name] for name in names],
+                'critical': [int(total_float[name] <= 0) for name in names],
+                'project_finish': max((starts[name] + durations[name] for name in names), default=0)
+            }
+        return self._cached(('gantt_data', planned, crash_budget or None), build)
 
-        # Ensure all activities have an initial start time in adjusted_start_times
-        for activity in self.activities:
-            if activity not in self.adjusted_start_times:
-                self.adjusted_start_times[activity] = earliest_start.get(activity, 0)
+    def get_start_time(self, node):
+        # Use adjusted start time if available
+        return self.get_snapshot().start_time(node)
 
-        return earliest_start
+    def calculate_earliest_start_times(self):
+        schedule = self.get_schedule()
+        return schedule.by_name(schedule.early_start)
 
 
     def calculate_latest_finish_times(self):
-        aon_graph = nx.DiGraph()
-
-        for activity, preds in self.predecessors.items():
-            for pred in preds:
-                aon_graph.add_edge(pred, activity)
-
-        topo_sort = list(nx.topological_sort(aon_graph))
-        earliest_start = self.calculate_earliest_start_times()
-        latest_finish = {}
-        max_earliest_finish = max(earliest_start[node] + self.activities[node]['duration'] for node in earliest_start)
-
-        for node in reversed(topo_sort):
-            if not list(aon_graph.successors(node)):
-                latest_finish[node] = max_earliest_finish
-            else:
-                latest_finish[node] = min(latest_finish[succ] - self.activities[node]['duration'] for succ in aon_graph.successors(node))
-            deadline = self.deadlines.get(node)
-            if deadline is not None:
-                latest_finish[node] = min(latest_finish[node], deadline)
-
-        return latest_finish
+        # Unlike calculate_critical_path, this view honours activity deadlines
+        schedule = self._compute_schedule(deadlines=self.deadlines)
+        return schedule.by_name(schedule.late_finish)
 
     def calculate_critical_path(self):
-        aon_graph = nx.DiGraph()
-
-        for activity, preds in self.predecessors.items():
-            for pred in preds:
-                aon_graph.add_edge(pred, activity)
-
-        topo_sort = list(nx.topological_sort(aon_graph))
-
-        earliest_start = {}
-        earliest_finish = {}
-        for node in topo_sort:
-            if not list(aon_graph.predecessors(node)):
-                earliest_start[node] = 0
+        return self.get_schedule().as_dict()
+
+    def get_critical_paths(self, limit=100):
+        # Distinct critical chains; parallel chains are listed separately
+        return self._cached(('critical_paths', limit),
+                            lambda: critical_paths(self.get_network(), self.get_schedule(), limit))
+
+    def get_near_critical_paths(self, k=10, max_float=None):
+        return self._cached(('near_critical_paths', k, max_float),
+                            lambda: near_critical_paths(self.get_network(), self.get_schedule(), k, max_float))
+
+    def calculate_floats(self):
+        schedule = self.get_schedule()
+        return schedule.by_name(schedule.total_float), schedule.by_name(schedule.free_float)
+
+    def render_chart(self, chart, filename, planned=False, crash_budget=None):
+        # Draw one of the web app's charts to filename. For the Gantt chart
+        # ('sequence_of_events') planned plots the adjusted or resource-
+        # constrained starts and crash_budget the crash plan for that budget
+        if chart == 'sequence_of_events':
+            if crash_budget:
+                plan = self.get_crash_plan(crash_budget)
+                self.plot_sequence_of_events(plan['critical_path'], before_smoothing=True, filename=filename, durations=plan['durations'])
             else:
-                earliest_start[node] = max([earliest_finish[pred] for pred in aon_graph.predecessors(node)])
-            earliest_finish[node] = earliest_start[node] + self.activities[node]['duration']
-
-        latest_start = {}
-        latest_finish = self.calculate_latest_finish_times()
-        for node in reversed(topo_sort):
-            if not list(aon_graph.successors(node)):
-                latest_finish[node] = earliest_finish[node]
-            else:
-                latest_finish[node] = min([latest_start[succ] for succ in aon_graph.successors(node)])
-            latest_start[node] = latest_finish[node] - self.activities[node]['duration']
-
-        critical_path = [node for node in topo_sort if earliest_start[node] == latest_start[node]]
-
-        # Calculate floats
-        total_float = {node: latest_finish[node] - earliest_finish[node] for node in aon_graph.nodes()}
-        free_float = {node: min([(earliest_start[succ] - earliest_finish[node]) for succ in aon_graph.successors(node)], default=total_float[node]) for node in aon_graph.nodes()}
-
-        return {
-            'critical_path': ' -> '.join(critical_path),
-            'early_start': earliest_start,
-            'late_start': latest_start,
-            'early_finish': earliest_finish,
-            'late_finish': latest_finish,
-            'total_float': total_float,
-            'free_float': free_float
-        }
+                start_times = self.get_snapshot().start_by_name if planned else None
+                self.plot_sequence_of_events(self.calculate_critical_path()['critical_path'], before_smoothing=True, filename=filename,
+                                             start_times=start_times)
+        elif chart == 'aoa_graph':
+            self.generate_aoa(filename)
+        elif chart == 'aon_graph':
+            self.generate_aon(filename)
+        elif chart == 'duration_vs_resources':
+            self.plot_duration_vs_resources(filename=filename)
+        elif chart == 'resource_smoothing_gantt_chart':
+            self.plot_resource_smoothing(filename)
+        elif chart == 's_curve':
+            self.plot_Scurve(filename)
+        else:
+            raise ValueError(f"Unknown chart '{chart}'.")
 
     def generate_aoa(self, filename='static/aoa_graph.png'):
         plt.switch_backend('Agg')  # Use non-GUI backend to avoid warnings
@@ -169,11 +458,7 @@ class ProjectManagementApp:
 
     def generate_aon(self, filename='static/aon_graph.png'):
         plt.switch_backend('Agg')  # Use non-GUI backend to avoid warnings
-        aon_graph = nx.DiGraph()
-
-        for activity, preds in self.predecessors.items():
-            for pred in preds:
-                aon_graph.add_edge(pred, activity)
+        aon_graph = self.get_network().to_networkx()
 
         pos = nx.spring_layout(aon_graph)
         
@@ -184,25 +469,21 @@ class ProjectManagementApp:
 
         nx.draw(aon_graph, pos, with_labels=True, **node_options)
         nx.draw_networkx_edges(aon_graph, pos, **edge_options)
+        # Label the typed and lagged links, e.g. "SS+2"; plain finish-to-start links stay bare
+        link_labels = {(u, v): f"{data['type']}{data['lag']:+g}" if data['lag'] else data['type']
+                       for u, v, data in aon_graph.edges(data=True) if (data['type'], data['lag']) != PLAIN_LINK}
+        if link_labels:
+            nx.draw_networkx_edge_labels(aon_graph, pos, edge_labels=link_labels, **label_options)
         
         plt.title("Activity on Node (AON) Diagram")
         plt.savefig(filename)
         plt.close()
 
     def plot_duration_vs_resources(self, before_smoothing=True, filename='static/duration_vs_resources.png'):
-        resources_timeline = defaultdict(int)
-        all_activities = set(self.activities.keys())
-
-        for node in all_activities:
-            duration = self.activities[node]['duration']
-            resources = self.activities[node]['resources']
-            start_time = self.get_start_time(node)
-
-            for t in range(start_time, start_time + duration):
-                resources_timeline[t] += sum(resources.values())
-
-        time_points = sorted(resources_timeline.keys())
-        resources_used = [resources_timeline[t] for t in time_points]
+        histogram = self.get_resource_histogram()
+        # Close the last step back down to zero at the end of the horizon
+        time_points = histogram.times.tolist() + [len(histogram.times)]
+        resources_used = histogram.total.tolist() + [0]
 
         plt.switch_backend('Agg')
         plt.figure(figsize=(10, 6))
@@ -215,9 +496,21 @@ class ProjectManagementApp:
         plt.savefig(filename)
         plt.close()
 
-    def plot_sequence_of_events(self, critical_path, before_smoothing=True, filename='static/sequence_of_events.png'):
-        earliest_start = self.calculate_earliest_start_times()
-        latest_finish = self.calculate_latest_finish_times()
+    def plot_sequence_of_events(self, critical_path, before_smoothing=True, filename='static/sequence_of_events.png', durations=None,
+                                start_times=None):
+        # Accept the ' -> ' joined string from calculate_critical_path as well as a list of names
+        if isinstance(critical_path, str):
+            critical_path = set(critical_path.split(' -> '))
+        # durations (name -> days) plots a what-if schedule, e.g. a crash plan, without changing the model
+        if durations is None:
+            durations = {name: activity['duration'] for name, activity in self.activities.items()}
+            earliest_start = self.calculate_earliest_start_times()
+        else:
+            schedule = self._schedule_with_durations(durations)
+            earliest_start = schedule.by_name(schedule.early_start)
+        # start_times (name -> day) plots given starts, e.g. a resource-constrained schedule, instead of the early starts
+        if start_times is not None:
+            earliest_start = start_times
         sorted_activities = sorted(self.activities.keys(), key=lambda x: earliest_start[x])
 
         fig, ax = plt.subplots(figsize=(12, 8))
@@ -230,26 +523,26 @@ class ProjectManagementApp:
                 for track in non_critical_tracks:
                     if not track or track[-1]['end_time'] <= min_start_time:
                         start_time = min_start_time
-                        end_time = start_time + self.activities[activity]['duration']
+                        end_time = start_time + durations[activity]
                         track.append({'activity': activity, 'start_time': start_time, 'end_time': end_time})
                         break
 
         for i, activity in enumerate(sorted_activities):
             if activity in critical_path:
                 start_time = earliest_start[activity]
-                ax.barh("Critical Path", self.activities[activity]['duration'], left=start_time, color=colors(i), alpha=0.6)
-                ax.text(start_time + self.activities[activity]['duration'] / 2, -0.2, activity, ha='center', va='center')
+                ax.barh("Critical Path", durations[activity], left=start_time, color=colors(i), alpha=0.6)
+                ax.text(start_time + durations[activity] / 2, -0.2, activity, ha='center', va='center')
             else:
                 for track_index, track in enumerate(non_critical_tracks):
                     for task in track:
                         if task['activity'] == activity:
-                            ax.barh(f"Non-Critical Path {track_index}", self.activities[activity]['duration'], left=task['start_time'], color=colors(i), alpha=0.6)
-                            ax.text(task['start_time'] + self.activities[activity]['duration'] / 2, track_index + 0.8, activity, ha='center', va='center')
+                            ax.barh(f"Non-Critical Path {track_index}", durations[activity], left=task['start_time'], color=colors(i), alpha=0.6)
+                            ax.text(task['start_time'] + durations[activity] / 2, track_index + 0.8, activity, ha='center', va='center')
 
                             if not before_smoothing:
                                 total_float, free_float = self.calculate_floats()
                                 total_float_time = total_float.get(activity, 0)
-                                ax.barh(f"Non-Critical Path {track_index}", total_float_time, left=task['start_time'] + self.activities[activity]['duration'], color='gray', alpha=0.3, linestyle='dotted')
+                                ax.barh(f"Non-Critical Path {track_index}", total_float_time, left=task['start_time'] + durations[activity], color='gray', alpha=0.3, linestyle='dotted')
 
         ax.set_xlabel('Cumulative Duration (days)')
         ax.set_ylabel('Activities')
@@ -271,7 +564,7 @@ class ProjectManagementApp:
         # Calculate necessary data
         critical_path_data = self.calculate_critical_path()
         critical_path = critical_path_data['critical_path'].split(' -> ')
-        adjusted_start = {**self.calculate_earliest_start_times(), **self.adjusted_start_times}
+        adjusted_start = self.get_snapshot().start_by_name
 
         fig, ax = plt.subplots(figsize=(12, 8))
         colors = plt.cm.get_cmap('tab20', len(self.activities))
@@ -349,49 +642,67 @@ class ProjectManagementApp:
 
         # Update start time logic
         self.adjusted_start_times[activity_name] = new_start_time
-
-        # Display the updated Gantt chart
-        self.plot_resource_smoothing('static/resource_smoothing_gantt_chart.png')
+        self.version += 1
 
         return f"New start time for '{activity_name}' is set to {new_start_time}"
 
-    def plot_cumulative_costs_over_time(self):
-        time_points = []
-        cumulative_costs = []
-        cumulative_cost = 0
-
-        # Calculate the total duration based on latest finish times
-        latest_finish = self.calculate_latest_finish_times()
-        total_duration = max(latest_finish.values())
-
-        for t in range(total_duration + 1):  # Include time point 0
-            # Reset daily cost at the start of each day
-            daily_cost = 0
-
-            # Calculate cumulative cost at current time
-            for activity_name, activity_data in self.activities.items():
-                start_time = self.get_start_time(activity_name)
-                duration = activity_data['duration']
-                resources = activity_data['resources']
-                resources_per_unit_cost = activity_data['resources_per_unit_cost']
-
-                # Calculate total cost based on resources and per-unit costs
-                for resource, amount in resources.items():
-                    unit_cost = resources_per_unit_cost.get(resource, 0)
-                    daily_cost += (amount * unit_cost) / duration
-
-                # Check if the activity is ongoing or has started
-                if start_time <= t < start_time + duration:
-                    cumulative_cost += daily_cost
-
-            # Append current cumulative cost to list
-            time_points.append(t)
-            cumulative_costs.append(cumulative_cost)
+    def schedule_with_resources(self, method='serial', rule='lft'):
+        # Resource-constrained schedule within max_resources (per resource
+        # type when it is a dict). The starts replace adjusted_start_times so
+        # every chart and the S-curve follow the feasible plan
+        schedule = self.get_schedule()
+        result = resource_constrained_schedule(self.get_network(), self.activities, schedule,
+                                               self.get_resource_capacities(), method, rule)
+        return self._use_resource_schedule(result, schedule)
+
+    def optimize_resource_schedule(self, time_budget=5.0, workers=1, seed=None):
+        # Like schedule_with_resources, but keeps the shortest of many
+        # randomized and improved schedules found within time_budget seconds
+        schedule = self.get_schedule()
+        result = search_schedule(self.get_network(), self.activities, schedule, self.get_resource_capacities(),
+                                 time_budget, workers, seed)
+        return self._use_resource_schedule(result, schedule)
+
+    def schedule_within_cash(self):
+        # Delay activities (non-critical ones first) so that cumulative spend
+        # never runs ahead of the cumulative cash injections; starts from the
+        # current plan, so a resource-constrained or leveled plan is kept
+        schedule = self.get_schedule()
+        result = cash_constrained_schedule(self.get_network(), self.activities, self.get_snapshot(), schedule,
+                                           self.cash_injections)
+        return self._use_resource_schedule(result, schedule)
+
+    def _use_resource_schedule(self, result, schedule):
+        early_start = schedule.by_name(schedule.early_start)
+        self.adjusted_start_times = {name: start for name, start in result.by_name().items() if start != early_start[name]}
+        self.version += 1
+        print(f"Rescheduled ({result.method}, {result.rule}): {result.makespan} days "
+              f"against {schedule.project_finish} without limits.")
+        return result
+
+    def level_resources(self, objective='moment'):
+        # Automatic leveling: shift the non-critical activities within their
+        # float to flatten the resource histogram ('moment' minimises the sum
+        # of squared daily usage, 'peak' the highest daily usage first). The
+        # result replaces adjusted_start_times; returns the histograms before and after
+        network = self.get_network()
+        schedule = self.get_schedule()
+        before = self.get_resource_histogram()
+        start, after = level_schedule(network, self.activities, self.get_snapshot(), schedule.project_finish,
+                                      set(schedule.critical_nodes()), objective)
+        self.adjusted_start_times = {
+            name: start[node] for node, name in enumerate(network.names) if start[node] != schedule.early_start[node]
+        }
+        self.version += 1
+        print(f"Resource leveling moved {len(self.adjusted_start_times)} activities.")
+        return before, after
 
-        return time_points, cumulative_costs
+    def plot_cumulative_costs_over_time(self):
+        profile = self.get_cost_profile()
+        return profile.times.tolist(), profile.cumulative.tolist()
 
 
-    def plot_Scurve(self):
+    def plot_Scurve(self, filename='static/s_curve.png'):
         # Calculate cumulative costs over time
         time_points_cumulative, cumulative_costs = self.plot_cumulative_costs_over_time()
 
@@ -438,7 +749,7 @@ class ProjectManagementApp:
         plt.tight_layout()
 
         # Save the plot to a file instead of showing it
-        plt.savefig('static/s_curve.png')  # Saves the figure as 's_curve.png' in the 'static' directory
+        plt.savefig(filename)
         plt.close()  # Close the plot to free up memory
 
 
@@ -489,6 +800,7 @@ class ProjectManagementApp:
 
             if min_duration < current_duration:
                 self.activities[activity_name]['duration'] = min_duration
+                self._duration_changed(activity_name)
                 print(f"Activity '{activity_name}' crashed successfully to {min_duration} days (from {current_duration} days).")
             else:
                 print(f"Activity '{activity_name}' already crashed to its minimum duration.")
@@ -496,59 +808,15 @@ class ProjectManagementApp:
             print(f"Error: Activity '{activity_name}' not found.")
 
     def crash_activities_until_irreducible_path(self, crash_budget):
-        current_critical_path = self.calculate_critical_path()
-        original_critical_path = current_critical_path.copy()
-        crashed_activities = set()  # Track activities that have already been crashed
-        remaining_budget = crash_budget  # Track remaining budget
-
-        while True:
-            # Find the least expensive activity to crash on the current critical path within the budget
-            least_expensive_activity = None
-            least_expensive_total_crash_cost = float('inf')
-            lowest_crash_cost_per_day_activity = None
-            lowest_crash_cost_per_day = float('inf')
-
-            for activity in self.activities:
-                if activity not in crashed_activities:
-                    current_duration = self.activities[activity]['duration']
-                    crash_duration = self.activities[activity]['crash_duration']
-                    crash_cost_per_day = self.activities[activity]['crash_cost']
-
-                    if crash_duration > 0:  # Only consider activities that can still be crashed
-                        days_reduced = current_duration - crash_duration
-                        total_crash_cost = crash_cost_per_day * days_reduced
-
-                        if crash_cost_per_day < lowest_crash_cost_per_day:
-                            if total_crash_cost <= remaining_budget:
-                                least_expensive_activity = activity
-                                least_expensive_total_crash_cost = total_crash_cost
-
-            if least_expensive_activity is None:
-                break  # No more activities to crash within budget
-
-            # Crash the least expensive activity on the current critical path
-            crash_duration = self.activities[least_expensive_activity]['crash_duration']
-            self.crash_activity(least_expensive_activity, crash_duration)
-
-            # Deduct the total crash cost from the remaining crash budget
-            remaining_budget -= least_expensive_total_crash_cost
-
-            # Add the activity to crashed_activities to prevent further crashing
-            crashed_activities.add(least_expensive_activity)
-
-            # Recalculate the critical path after crashing an activity
-            current_critical_path = self.calculate_critical_path()
-
-            # Check if the critical path has changed; if not, continue crashing
-            if current_critical_path == original_critical_path:
-                continue
-
-            # Update original critical path to the new critical path found
-            original_critical_path = current_critical_path.copy()
-
-        print("Irreducible path achieved with all activities at their minimum crash durations.")
-        print(f"Remaining budget after crashing: ${remaining_budget:.2f}")
-        return original_critical_path
+        # Spend the budget along the optimal time-cost curve: the shortest
+        # project duration the budget can buy, at the least cost
+        plan = self.get_crash_plan(crash_budget)
+        for activity, days_reduced in plan['reductions'].items():
+            self.crash_activity(activity, self.activities[activity]['duration'] - days_reduced)
+
+        print(f"Project duration crashed to {plan['project_duration']} days for ${plan['crash_cost']:.2f}.")
+        print(f"Remaining budget after crashing: ${plan['remaining_budget']:.2f}")
+        return self.calculate_critical_path()
 
 
 
@@ -0,0 +1,92 @@
+import heapq
+import math
+
+import numpy as np
+
+from backend.network import earliest_start
+from backend.rcpsp import ResourceSchedule
+
+EPSILON = 1e-9
+
+
+def activity_cost(activity):
+    return sum(amount * activity['resources_per_unit_cost'].get(resource, 0)
+               for resource, amount in activity['resources'].items())
+
+
+class CashProfile:
+    # Cumulative spend checked against cumulative cash. Cash only arrives at
+    # injection times, so spend(t) <= cash(t) for every t reduces to a check
+    # just before each injection (and once at the end against the total):
+    # spend is continuous and rising, cash is flat in between. Each activity
+    # spends its cost linearly from start to finish, as on the S-curve, and
+    # its spend at every check point is known as soon as its start is.
+    def __init__(self, cash_injections):
+        times = sorted(cash_injections)
+        amounts = np.asarray([cash_injections[time] for time in times], dtype=float)
+        # Check point j may have spent at most limit[j] by then
+        self.points = np.asarray(times + [math.inf], dtype=float)
+        self.limit = np.concatenate([[0.0], np.cumsum(amounts)])
+        self.spent = np.zeros(len(self.points))
+
+    @property
+    def total(self):
+        return float(self.limit[-1])
+
+    def _spend(self, cost, duration, start):
+        if duration <= 0:
+            return cost * (self.points > start)
+        return cost * np.clip((self.points - start) / duration, 0, 1)
+
+    def earliest(self, cost, duration, start):
+        # Starting later only lowers the spend at every check point, so each
+        # check point gives a lower bound on the start; the latest one wins
+        slack = self.limit - self.spent
+        short = slack < cost - EPSILON
+        if not short.any():
+            return start
+        if short[-1]:
+            raise ValueError("The cash injections do not cover the cost of the project.")
+        if duration <= 0:
+            bound = self.points[short].max()
+        else:
+            bound = (self.points[short] - duration * np.maximum(slack[short], 0) / cost).max()
+        return max(start, math.ceil(bound - EPSILON))
+
+    def spend(self, cost, duration, start):
+        self.spent += self._spend(cost, duration, start)
+
+
+def cash_constrained_schedule(network, activities, snapshot, schedule, cash_injections):
+    # Delay activities until the cash to pay for them has come in. Activities
+    # are placed one at a time in order of their current start, the ones with
+    # the least float first, each at the earliest day that respects its
+    # predecessors, its current start and the cash profile; so non-critical
+    # work is pushed back before critical work is. Each placement costs one
+    # pass over the injection times, never a day-by-day loop.
+    if not cash_injections:
+        raise ValueError("No cash injections recorded.")
+    profile = CashProfile(cash_injections)
+    costs = [activity_cost(activities[name]) for name in network.names]
+    if sum(costs) > profile.total + EPSILON:
+        raise ValueError(f"The project costs ${sum(costs):.2f} but the cash injections only add up to ${profile.total:.2f}.")
+
+    preds, succs, position = network.preds, network.succs, network.position
+    durations = snapshot.durations
+    waiting = [len(preds[node]) for node in range(len(network))]
+    start, finish = [0] * len(network), [0] * len(network)
+    eligible = [(snapshot.start[node], schedule.total_float[node], position[node], node)
+                for node in range(len(network)) if not waiting[node]]
+    heapq.heapify(eligible)
+    while eligible:
+        node = heapq.heappop(eligible)[3]
+        time = max(snapshot.start[node], earliest_start(network, node, start, finish, durations[node]))
+        if costs[node] > 0:
+            time = profile.earliest(costs[node], durations[node], time)
+            profile.spend(costs[node], durations[node], time)
+        start[node], finish[node] = time, time + durations[node]
+        for succ in succs[node]:
+            waiting[succ] -= 1
+            if not waiting[succ]:
+                heapq.heappush(eligible, (snapshot.start[succ], schedule.total_float[succ], position[succ], succ))
+    return ResourceSchedule(network.names, start, finish, 'cash', f'{len(cash_injections)} injections')
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+class ChartCache:
+    # Rendered chart images under content-addressed names: the file name is a
+    # hash of the chart type, its options and the state of the model it is
+    # drawn from, so an unchanged chart is rendered once, a changed model gets
+    # a new name, and no two projects ever write to the same file. The
+    # folder is capped at max_bytes; the least recently used images go first.
+    def __init__(self, folder, max_bytes=200 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._files = OrderedDict()  # name -> size in bytes, least recently used first
+        self._size = 0
+        self._lock = threading.Lock()
+        self._rendering = {}  # name -> lock, so one chart is not drawn twice at once
+        self.hits = self.misses = 0
+        os.makedirs(folder, exist_ok=True)
+        # Images from an earlier run still count towards the cap
+        paths = [os.path.join(folder, name) for name in os.listdir(folder) if name.endswith('.png') and '.tmp.' not in name]
+        for path in sorted(paths, key=os.path.getmtime):
+            self._files[os.path.basename(path)] = os.path.getsize(path)
+            self._size += self._files[os.path.basename(path)]
+        with self._lock:
+            self._evict()
+
+    @staticmethod
+    def chart_name(chart, state, options=None):
+        key = repr((chart, state, sorted((options or {}).items())))
+        return f'{chart}-{hashlib.sha256(key.encode()).hexdigest()[:32]}.png'
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def partial_path(self, name, tag):
+        # Where a chart is drawn before add() moves it into place; ends in
+        # .png so matplotlib picks the format from it
+        return f'{self.path(name)}.{tag}.tmp.png'
+
+    def cached(self, name):
+        with self._lock:
+            if name not in self._files:
+                return False
+            self._files.move_to_end(name)
+            self.hits += 1
+            return True
+
+    def add(self, name, partial):
+        # Move a chart drawn elsewhere (e.g. by a background job) into place;
+        # renaming means a request for the image never sees it half written
+        os.replace(partial, self.path(name))
+        with self._lock:
+            if name in self._files:
+                self._size -= self._files[name]
+            self._files[name] = os.path.getsize(self.path(name))
+            self._size += self._files[name]
+            self._evict(keep=name)
+
+    def render(self, chart, state, draw, options=None):
+        # File name of the chart, drawn with draw(path) unless an identical
+        # one is already cached
+        name = self.chart_name(chart, state, options)
+        if self.cached(name):
+            return name
+        with self._lock:
+            rendering = self._rendering.setdefault(name, threading.Lock())
+
+        with rendering:
+            with self._lock:
+                if name in self._files:
+                    self.hits += 1
+                    return name
+                self.misses += 1
+            partial = self.partial_path(name, threading.get_ident())
+            try:
+                draw(partial)
+                self.add(name, partial)
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+                with self._lock:
+                    self._rendering.pop(name, None)
+        return name
+
+    def _evict(self, keep=None):
+        for name in list(self._files):
+            if self._size <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            self._size -= self._files.pop(name)
+            try:
+                os.remove(self.path(name))
+            except FileNotFoundError:
+                pass
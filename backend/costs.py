@@ -0,0 +1,87 @@
+import math
+
+import numpy as np
+
+
+class CostProfile:
+    # Cumulative spend sampled at `times`, in total and per resource type
+    def __init__(self, times, cumulative, resource_types, by_resource):
+        self.times = times
+        self.cumulative = cumulative
+        self.resource_types = resource_types
+        self.by_resource = by_resource
+
+    @property
+    def total_cost(self):
+        return float(self.cumulative[-1]) if len(self.cumulative) else 0.0
+
+    def as_dict(self):
+        return {
+            'time': self.times.tolist(),
+            'cumulative_cost': self.cumulative.tolist(),
+            'by_resource': {resource: self.by_resource[i].tolist() for i, resource in enumerate(self.resource_types)}
+        }
+
+
+def _cost_rows(activities, snapshot):
+    # One row per (activity, resource type): when the spend starts and ends and how much it is
+    resource_index = {}
+    rows_resource, rows_start, rows_finish, rows_cost = [], [], [], []
+    for name, start, finish in zip(snapshot.names, snapshot.start, snapshot.finish):
+        activity = activities[name]
+        for resource, amount in activity['resources'].items():
+            cost = amount * activity['resources_per_unit_cost'].get(resource, 0)
+            if not cost:
+                continue
+            rows_resource.append(resource_index.setdefault(resource, len(resource_index)))
+            rows_start.append(start)
+            rows_finish.append(finish)
+            rows_cost.append(cost)
+    return (list(resource_index), np.asarray(rows_resource, dtype=np.int64), np.asarray(rows_start, dtype=float),
+            np.asarray(rows_finish, dtype=float), np.asarray(rows_cost, dtype=float))
+
+
+def _cumulative_at(points, start, finish, cost, inclusive):
+    # Each row spends its cost linearly between start and finish, so the
+    # cumulative curve is piecewise linear with breakpoints at the starts and
+    # finishes: a difference array of slope changes, integrated with two
+    # cumsums, is exact at every breakpoint and np.interp fills in between.
+    # Zero-length rows are lump sums at their start.
+    lump = finish <= start
+    spread = ~lump
+    rate = cost[spread] / (finish[spread] - start[spread])
+    times = np.concatenate([start[spread], finish[spread]])
+    changes = np.concatenate([rate, -rate])
+    order = np.argsort(times, kind='stable')
+    times, changes = times[order], changes[order]
+    slope = np.cumsum(changes)
+    cumulative = np.concatenate([[0.0], np.cumsum(slope[:-1] * np.diff(times))]) if len(times) else np.zeros(0)
+    result = np.interp(points, times, cumulative) if len(times) else np.zeros(len(points))
+
+    lump_times = start[lump]
+    order = np.argsort(lump_times)
+    lump_totals = np.concatenate([[0.0], np.cumsum(cost[lump][order])])
+    reached = np.searchsorted(lump_times[order], points, side='right' if inclusive else 'left')
+    return result + lump_totals[reached]
+
+
+def cost_profile(activities, snapshot, granularity='day'):
+    # 'day' samples the curve once per day, with day t covering the spend up
+    # to the end of that day (as the S-curve always has). 'event' samples it
+    # at every activity start and finish, which also suits fractional durations.
+    resource_types, resource, start, finish, cost = _cost_rows(activities, snapshot)
+    end = max(snapshot.finish, default=0)
+    if granularity == 'day':
+        times = np.arange(int(math.ceil(end)) + 1)
+        points, inclusive = times + 1, False
+    elif granularity == 'event':
+        times = np.unique(np.concatenate([[0.0], start, finish, [end]]))
+        points, inclusive = times, True
+    else:
+        raise ValueError(f"Unknown granularity: {granularity}")
+
+    by_resource = np.zeros((len(resource_types), len(times)))
+    for i in range(len(resource_types)):
+        rows = resource == i
+        by_resource[i] = _cumulative_at(points, start[rows], finish[rows], cost[rows], inclusive)
+    return CostProfile(times, by_resource.sum(axis=0), resource_types, by_resource)
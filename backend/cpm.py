@@ -0,0 +1,270 @@
+import heapq
+
+from backend.network import earliest_start, latest_finish
+
+
+class Schedule:
+    # Every CPM quantity for one compiled network. Lists are indexed like
+    # network.names so later passes can reuse them without dict lookups.
+    def __init__(self, network, early_start, early_finish, late_start, late_finish,
+                 total_float, free_float, interfering_float, independent_float, project_finish):
+        self.network = network
+        self.early_start = early_start
+        self.early_finish = early_finish
+        self.late_start = late_start
+        self.late_finish = late_finish
+        self.total_float = total_float
+        self.free_float = free_float
+        self.interfering_float = interfering_float
+        self._independent_float = independent_float
+        self.project_finish = project_finish
+
+    @property
+    def independent_float(self):
+        # Needs the late finish of every predecessor, so after an incremental
+        # update it is recomputed on first use instead of patched in place
+        if self._independent_float is None:
+            self._independent_float = _independent_float(self.network, self.early_start, self.late_finish, self.free_float)
+        return self._independent_float
+
+    def is_critical(self, node):
+        return self.total_float[node] <= 0
+
+    def critical_nodes(self):
+        return [node for node in self.network.order if self.is_critical(node)]
+
+    def by_name(self, values):
+        names = self.network.names
+        return {names[node]: values[node] for node in self.network.order}
+
+    def as_dict(self):
+        names = self.network.names
+        return {
+            'critical_path': ' -> '.join(names[node] for node in self.critical_nodes()),
+            'project_finish': self.project_finish,
+            'early_start': self.by_name(self.early_start),
+            'late_start': self.by_name(self.late_start),
+            'early_finish': self.by_name(self.early_finish),
+            'late_finish': self.by_name(self.late_finish),
+            'total_float': self.by_name(self.total_float),
+            'free_float': self.by_name(self.free_float),
+            'interfering_float': self.by_name(self.interfering_float),
+            'independent_float': self.by_name(self.independent_float)
+        }
+
+
+class ScheduleSnapshot:
+    # Effective start and finish of every activity for one model version:
+    # the adjusted start where the user set one, the early start otherwise.
+    # Plotting and costing code reads from here instead of re-running CPM.
+    def __init__(self, schedule, durations, adjusted_start_times, version):
+        network = schedule.network
+        self.version = version
+        self.schedule = schedule
+        self.names = network.names
+        self.durations = list(durations)
+        early_start = schedule.early_start
+        self.start = early_start.tolist() if hasattr(early_start, 'tolist') else list(early_start)
+        for name, start in adjusted_start_times.items():
+            if name in network.index:
+                self.start[network.index[name]] = start
+        self.finish = [start + duration for start, duration in zip(self.start, self.durations)]
+        self.start_by_name = dict(zip(self.names, self.start))
+
+    def start_time(self, name):
+        return self.start_by_name.get(name, 0)
+
+
+def compute_schedule(network, deadlines=None):
+    # One forward pass and one backward pass over the topological order, each
+    # edge visited once per pass. Deadlines, when given, cap the late finish
+    # of their activity and can therefore produce negative float. Activities
+    # with typed or lagged links go through earliest_start / latest_finish;
+    # the rest keep the inline finish-to-start loops.
+    size = len(network)
+    durations = network.durations
+    preds, succs = network.preds, network.succs
+    pred_links, succ_links = network.pred_links, network.succ_links
+
+    early_start = [0] * size
+    early_finish = [0] * size
+    for node in network.order:
+        if pred_links[node] is None:
+            start = 0
+            for pred in preds[node]:
+                if early_finish[pred] > start:
+                    start = early_finish[pred]
+        else:
+            start = earliest_start(network, node, early_start, early_finish, durations[node])
+        early_start[node] = start
+        early_finish[node] = start + durations[node]
+
+    project_finish = max(early_finish, default=0)
+    late_start = [0] * size
+    late_finish = [0] * size
+    total_float = [0] * size
+    free_float = [0] * size
+    for node in reversed(network.order):
+        if succ_links[node] is None:
+            finish = project_finish
+            next_start = project_finish
+            for succ in succs[node]:
+                if late_start[succ] < finish:
+                    finish = late_start[succ]
+                if early_start[succ] < next_start:
+                    next_start = early_start[succ]
+            free_float[node] = next_start - early_finish[node]
+        else:
+            finish = latest_finish(network, node, late_start, late_finish, durations[node], project_finish)
+            free_float[node] = _free_float(network, node, early_start, early_finish, project_finish)
+        if deadlines:
+            deadline = deadlines.get(network.names[node])
+            if deadline is not None and deadline < finish:
+                finish = deadline
+        late_finish[node] = finish
+        late_start[node] = finish - durations[node]
+        total_float[node] = finish - early_finish[node]
+
+    interfering_float = [total_float[node] - free_float[node] for node in range(size)]
+    independent_float = _independent_float(network, early_start, late_finish, free_float)
+
+    return Schedule(network, early_start, early_finish, late_start, late_finish,
+                    total_float, free_float, interfering_float, independent_float, project_finish)
+
+
+def _free_float(network, node, early_start, early_finish, project_finish):
+    # How far node can slip without delaying any successor: the smallest gap
+    # between what a link requires and the successor's early times
+    links = network.succ_links[node]
+    if links is None:
+        return min((early_start[succ] for succ in network.succs[node]), default=project_finish) - early_finish[node]
+    gap = project_finish - early_finish[node]
+    for succ, (kind, lag) in zip(network.succs[node], links):
+        after = (early_start[succ] if kind[1] == 'S' else early_finish[succ]) - lag
+        before = early_start[node] if kind[0] == 'S' else early_finish[node]
+        if after - before < gap:
+            gap = after - before
+    return gap
+
+
+def _independent_float(network, early_start, late_finish, free_float):
+    # Independent float = free float measured from the start the predecessors
+    # allow when they all run late, rather than from the activity's own early
+    # start (for plain links, the latest late finish of the predecessors)
+    durations = network.durations
+    late_start = [finish - duration for finish, duration in zip(late_finish, durations)] if network.linked else None
+    independent_float = [0] * len(network)
+    for node, preds in enumerate(network.preds):
+        if network.pred_links[node] is None:
+            prior_finish = max((late_finish[pred] for pred in preds), default=0)
+        else:
+            prior_finish = earliest_start(network, node, late_start, late_finish, durations[node])
+        slack = free_float[node] + early_start[node] - prior_finish
+        independent_float[node] = slack if slack > 0 else 0
+    return independent_float
+
+
+def update_schedule(schedule, nodes, finish_dropped=False):
+    # Re-time a deadline-free schedule in place after the durations or links
+    # of `nodes` changed in schedule.network. Early times are pushed forward
+    # through the successors and late times back through the predecessors, in
+    # topological order, and each push stops at the first activity whose
+    # times do not move. finish_dropped says the project finish may have
+    # fallen for another reason, such as a removed activity.
+    network = schedule.network
+    durations, preds, succs, position = network.durations, network.preds, network.succs, network.position
+    early_start, early_finish = schedule.early_start, schedule.early_finish
+    late_start, late_finish = schedule.late_start, schedule.late_finish
+    total_float, free_float = schedule.total_float, schedule.free_float
+
+    heap = [(position[node], node) for node in nodes]
+    heapq.heapify(heap)
+    queued = set(nodes)
+    moved_forward = []
+    while heap:
+        _, node = heapq.heappop(heap)
+        start = earliest_start(network, node, early_start, early_finish, durations[node])
+        finish = start + durations[node]
+        if start == early_start[node] and finish == early_finish[node]:
+            continue
+        if early_finish[node] == schedule.project_finish and finish < early_finish[node]:
+            finish_dropped = True
+        early_start[node] = start
+        early_finish[node] = finish
+        moved_forward.append(node)
+        for succ in succs[node]:
+            if succ not in queued:
+                queued.add(succ)
+                heapq.heappush(heap, (position[succ], succ))
+
+    # A new project finish moves every late time by the same amount
+    project_finish = max((early_finish[node] for node in moved_forward), default=schedule.project_finish)
+    if finish_dropped or project_finish < schedule.project_finish:
+        project_finish = max(early_finish, default=0)
+    else:
+        project_finish = max(project_finish, schedule.project_finish)
+    shift = project_finish - schedule.project_finish
+    schedule.project_finish = project_finish
+    if shift:
+        late_start[:] = [value + shift for value in late_start]
+        late_finish[:] = [value + shift for value in late_finish]
+
+    heap = [(-position[node], node) for node in nodes]
+    heapq.heapify(heap)
+    queued = set(nodes)
+    moved_backward = []
+    while heap:
+        _, node = heapq.heappop(heap)
+        finish = latest_finish(network, node, late_start, late_finish, durations[node], project_finish)
+        start = finish - durations[node]
+        if start == late_start[node] and finish == late_finish[node]:
+            continue
+        late_start[node] = start
+        late_finish[node] = finish
+        moved_backward.append(node)
+        for pred in preds[node]:
+            if pred not in queued:
+                queued.add(pred)
+                heapq.heappush(heap, (-position[pred], pred))
+
+    # Floats: total float follows the moved activities (all of them after a
+    # shift), free float the activities whose own or successors' early times
+    # moved, plus those whose free float can run to the project finish: the
+    # sinks and the activities with typed or lagged successor links. `nodes`
+    # themselves are always refloated, as their links may have changed
+    changed = set(moved_forward).union(moved_backward)
+    refloat = set(moved_forward).union(pred for node in moved_forward for pred in preds[node])
+    refloat.update(nodes)
+    if shift:
+        changed = range(len(network))
+        refloat.update(node for node in changed if not succs[node] or network.succ_links[node] is not None)
+    for node in refloat:
+        free_float[node] = _free_float(network, node, early_start, early_finish, project_finish)
+    for node in refloat.union(changed):
+        total_float[node] = late_finish[node] - early_finish[node]
+        schedule.interfering_float[node] = total_float[node] - free_float[node]
+    schedule._independent_float = None
+
+
+def rebase_schedule(schedule, network, nodes):
+    # Carry a deadline-free schedule over to a recompiled network (activities
+    # added, removed or relinked) and re-time it around `nodes`: the new
+    # network's activities whose duration or links changed, new activities
+    # and both ends of every added or removed link. Activities kept from the
+    # old network start from their old times, new ones from placeholders.
+    old = schedule.network
+    mapping = [old.index.get(name) for name in network.names]
+
+    def carry(values, default):
+        return [default if node is None else values[node] for node in mapping]
+
+    project_finish = schedule.project_finish
+    rebased = Schedule(network, carry(schedule.early_start, 0), carry(schedule.early_finish, 0),
+                       carry(schedule.late_start, project_finish), carry(schedule.late_finish, project_finish),
+                       carry(schedule.total_float, 0), carry(schedule.free_float, 0),
+                       carry(schedule.interfering_float, 0), None, project_finish)
+    # Removing an activity that finished last may bring the project finish in
+    finish_dropped = any(name not in network.index and schedule.early_finish[node] == project_finish
+                         for node, name in enumerate(old.names))
+    update_schedule(rebased, nodes, finish_dropped)
+    return rebased
@@ -0,0 +1,228 @@
+import copy
+import math
+from bisect import bisect_right
+from collections import defaultdict
+
+import networkx as nx
+from networkx.algorithms.flow import boykov_kolmogorov
+
+from backend.cpm import compute_schedule, update_schedule
+
+SOURCE, SINK = 'source', 'sink'
+EPSILON = 1e-9
+
+
+class CrashCurve:
+    # Piecewise-linear project duration vs crash cost curve. Breakpoint i is
+    # reached by shortening the activities in reductions[i] (name -> days);
+    # between breakpoints cost grows linearly as the duration falls.
+    def __init__(self, durations, costs, reductions):
+        self.durations = durations
+        self.costs = costs
+        self.reductions = reductions
+
+    def at_budget(self, budget, whole_days=True):
+        # Shortest schedule affordable with `budget`: (project duration, cost,
+        # reductions). whole_days keeps the project duration to whole days
+        k = bisect_right(self.costs, budget + EPSILON) - 1
+        if k < 0:
+            return self.durations[0], 0, {}
+        if k == len(self.costs) - 1:
+            return self.durations[k], self.costs[k], dict(self.reductions[k])
+
+        span = self.durations[k] - self.durations[k + 1]
+        slope = (self.costs[k + 1] - self.costs[k]) / span
+        days = span if slope == 0 else min((budget - self.costs[k]) / slope, span)
+        if whole_days:
+            days = self.durations[k] - math.ceil(self.durations[k] - days - EPSILON)
+        if days <= 0:
+            return self.durations[k], self.costs[k], dict(self.reductions[k])
+
+        # Within a segment every activity moves at one day per project day (or not at all)
+        reductions = {}
+        for name in set(self.reductions[k]).union(self.reductions[k + 1]):
+            before, after = self.reductions[k].get(name, 0), self.reductions[k + 1].get(name, 0)
+            reduction = before + (after - before) * days / span
+            if reduction:
+                reductions[name] = reduction
+        return self.durations[k] - days, self.costs[k] + slope * days, reductions
+
+    def as_dict(self):
+        return {
+            'duration': self.durations,
+            'cost': self.costs,
+            'reductions': self.reductions
+        }
+
+
+def _min_cut(arcs):
+    # Minimum SOURCE-SINK cut when every arc (u, v, lower, upper) carries a
+    # lower bound on its flow: the cut value is the sum of upper bounds of
+    # forward arcs minus the lower bounds of backward arcs. upper=None is
+    # unbounded. A feasible flow is found first through the usual
+    # super-source/super-sink reduction, then augmented to a maximum flow on
+    # its residual network. Returns the source side, or None when every cut
+    # is infinite. Boykov-Kolmogorov is several times faster than the default
+    # preflow-push on these long, thin critical networks.
+    feasible = nx.DiGraph()
+    excess = defaultdict(float)
+    for u, v, lower, upper in arcs:
+        if upper is None:
+            feasible.add_edge(u, v)
+        else:
+            feasible.add_edge(u, v, capacity=upper - lower)
+        excess[v] += lower
+        excess[u] -= lower
+
+    flow = defaultdict(float)
+    if any(excess.values()):
+        feasible.add_edge(SINK, SOURCE)
+        for node, amount in list(excess.items()):
+            if amount > 0:
+                feasible.add_edge('super_source', node, capacity=amount)
+            elif amount < 0:
+                feasible.add_edge(node, 'super_sink', capacity=-amount)
+        _, flow_dict = nx.maximum_flow(feasible, 'super_source', 'super_sink', flow_func=boykov_kolmogorov)
+        for u, v, _, _ in arcs:
+            flow[u, v] = flow_dict[u][v]
+
+    residual = nx.DiGraph()
+    residual.add_nodes_from([SOURCE, SINK])
+    for u, v, lower, upper in arcs:
+        current = lower + flow[u, v]
+        if upper is None:
+            residual.add_edge(u, v)
+        elif upper - current > 1e-9:
+            residual.add_edge(u, v, capacity=upper - current)
+        if current - lower > 1e-9:
+            residual.add_edge(v, u, capacity=current - lower)
+
+    try:
+        _, (source_side, _) = nx.minimum_cut(residual, SOURCE, SINK, flow_func=boykov_kolmogorov)
+    except nx.NetworkXUnbounded:
+        return None
+    return source_side
+
+
+def _lags(links, nodes):
+    # Lag of each finish-to-start link to or from a node
+    return [lag for _, lag in links] if links is not None else [0] * len(nodes)
+
+
+def _longest_path(network, durations, slopes):
+    # Project finish for the given durations, with the rate at which the
+    # longest path changes per day of crashing (ties go to the faster-growing path)
+    finish = [0] * len(network)
+    growth = [0] * len(network)
+    for node in network.order:
+        start, rate = 0, 0
+        for pred, lag in zip(network.preds[node], _lags(network.pred_links[node], network.preds[node])):
+            if finish[pred] + lag > start + EPSILON or (finish[pred] + lag > start - EPSILON and growth[pred] > rate):
+                start, rate = finish[pred] + lag, growth[pred]
+        finish[node] = start + durations[node]
+        growth[node] = rate + slopes.get(node, 0)
+    end = max(range(len(network)), key=lambda node: (finish[node], growth[node]), default=None)
+    return (finish[end], growth[end]) if end is not None else (0, 0)
+
+
+def _step_length(network, durations, shortened, lengthened, cap, project_finish):
+    # How long the cut can be applied: at most `cap` days, and only while no
+    # other path overtakes. Path lengths are linear in the step, so a path that
+    # overtakes at a trial step gives the exact point where it catches up;
+    # repeating from there converges on the breakpoint in a few passes.
+    slopes = dict.fromkeys(shortened, -1)
+    slopes.update(dict.fromkeys(lengthened, 1))
+    step = cap
+    while step > EPSILON:
+        trial = list(durations)
+        for node, slope in slopes.items():
+            trial[node] += slope * step
+        finish, growth = _longest_path(network, trial, slopes)
+        if finish <= project_finish - step + EPSILON:
+            break
+        step = (project_finish - (finish - growth * step)) / (growth + 1)
+    return step
+
+
+def solve_time_cost_tradeoff(network, activities):
+    # Phillips-Dessouky project crashing. Each step finds the cheapest way to
+    # shorten every critical path at once as a minimum cut of the critical
+    # network, where shortening an activity costs its crash cost per day and
+    # lengthening an already-crashed one refunds it. The cut is applied for as
+    # many days as it stays valid, and repeated until no finite cut is left.
+    # Runs on a private copy of the durations; the model is not changed.
+    # Finish-to-start lags are fixed lengths along a path and are supported;
+    # with other link types shortening an activity can lengthen the project,
+    # which the cut model does not capture, so those are refused.
+    for node, links in enumerate(network.pred_links):
+        for pred, (kind, _) in zip(network.preds[node], links or []):
+            if kind != 'FS':
+                raise ValueError(f"Crashing needs finish-to-start links, but '{network.names[pred]}' -> "
+                                 f"'{network.names[node]}' is {kind}.")
+    network = copy.copy(network)
+    network.durations = list(network.durations)
+    durations = network.durations
+    normal = list(durations)
+    names = network.names
+    limit = [max(min(activities[name]['crash_duration'], normal[node]), 0) for node, name in enumerate(names)]
+    rate = [activities[name]['crash_cost'] for name in names]
+    schedule = compute_schedule(network)
+
+    project_durations, costs, reductions = [schedule.project_finish], [0], [{}]
+    cost = 0
+    reduced = {}
+    while True:
+        early_start, early_finish = schedule.early_start, schedule.early_finish
+        critical = [node for node in network.order if schedule.total_float[node] <= EPSILON]
+        if not critical:
+            break
+        arcs = []
+        for node in critical:
+            lower = rate[node] if durations[node] < normal[node] - EPSILON else 0
+            upper = rate[node] if durations[node] > limit[node] + EPSILON else None
+            arcs.append((('in', node), ('out', node), lower, upper))
+            if early_start[node] <= EPSILON:
+                arcs.append((SOURCE, ('in', node), 0, None))
+            if early_finish[node] >= schedule.project_finish - EPSILON:
+                arcs.append((('out', node), SINK, 0, None))
+            for succ, lag in zip(network.succs[node], _lags(network.succ_links[node], network.succs[node])):
+                if schedule.total_float[succ] <= EPSILON and abs(early_start[succ] - early_finish[node] - lag) <= EPSILON:
+                    arcs.append((('out', node), ('in', succ), 0, None))
+
+        source_side = _min_cut(arcs)
+        if source_side is None:
+            break
+
+        shortened, lengthened = [], []
+        for u, v, lower, upper in arcs:
+            if u[0] != 'in':
+                continue
+            if u in source_side and v not in source_side:
+                shortened.append(u[1])
+            elif v in source_side and u not in source_side and lower > 0:
+                lengthened.append(u[1])
+        slope = sum(rate[node] for node in shortened) - sum(rate[node] for node in lengthened)
+
+        cap = min([durations[node] - limit[node] for node in shortened]
+                  + [normal[node] - durations[node] for node in lengthened])
+        step = _step_length(network, durations, shortened, lengthened, cap, schedule.project_finish)
+        if step <= EPSILON:
+            break
+        for node in shortened:
+            durations[node] -= step
+        for node in lengthened:
+            durations[node] += step
+        for node in shortened + lengthened:
+            if abs(durations[node] - normal[node]) <= EPSILON:
+                durations[node] = normal[node]
+                reduced.pop(names[node], None)
+            else:
+                reduced[names[node]] = normal[node] - durations[node]
+        update_schedule(schedule, shortened + lengthened)
+
+        cost += slope * step
+        project_durations.append(schedule.project_finish)
+        costs.append(cost)
+        reductions.append(dict(reduced))
+
+    return CrashCurve(project_durations, costs, reductions)
@@ -0,0 +1,111 @@
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+
+def run_method(payload, method, args, kwargs, keep=False):
+    # Worker side: call a method on an unpickled copy of a project. With keep
+    # the copy comes back pickled as well, holding whatever the call computed
+    # or changed, so the web process can adopt it
+    project = pickle.loads(payload)
+    result = getattr(project, method)(*args, **kwargs)
+    return result, pickle.dumps(project, protocol=pickle.HIGHEST_PROTOCOL) if keep else None
+
+
+class Job:
+    # One background call. state is queued, running, done or failed
+    def __init__(self, job_id, kind, key, future):
+        self.id = job_id
+        self.kind = kind
+        self.key = key
+        self.future = future
+        self.submitted = time.monotonic()
+        self.finished = None  # set once the result has been handled as well
+        self.error = None
+
+    @property
+    def state(self):
+        if self.finished is None:
+            return 'running' if self.future.running() or self.future.done() else 'queued'
+        return 'failed' if self.error is not None else 'done'
+
+    def result(self):
+        return self.future.result()
+
+    def status(self):
+        finished = self.finished if self.finished is not None else time.monotonic()
+        status = {'id': self.id, 'kind': self.kind, 'state': self.state, 'elapsed': round(finished - self.submitted, 3)}
+        if self.error is not None:
+            status['error'] = self.error
+        return status
+
+
+class JobQueue:
+    # Background calls run in a process pool, so long renders and solves
+    # neither block a request thread nor share matplotlib's global state.
+    # Jobs are keyed: submitting a key that is queued, running or done (and
+    # still kept) returns that job instead of starting the same work again.
+    # A failed job is forgotten, so submitting its key again retries it.
+    # The newest max_jobs jobs are kept for their results.
+    def __init__(self, workers=2, max_jobs=256):
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self._executor = None
+        self._jobs = OrderedDict()  # id -> Job, oldest first
+        self._keys = {}  # key -> Job
+        self._lock = threading.Lock()
+
+    def find(self, key):
+        with self._lock:
+            return self._keys.get(key)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def submit(self, key, kind, fn, *args, on_done=None):
+        # on_done(result) runs in the web process once fn has returned
+        with self._lock:
+            job = self._keys.get(key)
+            if job is not None:
+                return job
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            job = Job(uuid.uuid4().hex, kind, key, self._executor.submit(fn, *args))
+            self._jobs[job.id] = job
+            self._keys[key] = job
+            self._trim()
+        job.future.add_done_callback(lambda future: self._finished(job, on_done))
+        return job
+
+    def _finished(self, job, on_done):
+        if job.future.cancelled():
+            job.error = 'The job was cancelled.'
+        elif job.future.exception() is not None:
+            job.error = str(job.future.exception())
+        elif on_done is not None:
+            try:
+                on_done(job.result())
+            except Exception as e:
+                job.error = f"The result could not be stored: {e}"
+        if job.error is not None:
+            print(f"Job {job.id} ({job.kind}) failed: {job.error}")
+            with self._lock:
+                if self._keys.get(job.key) is job:
+                    del self._keys[job.key]
+        job.finished = time.monotonic()
+
+    def _trim(self):
+        # Forget the oldest finished jobs; unfinished ones are never dropped
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            job = self._jobs[job_id]
+            if job.finished is None:
+                continue
+            del self._jobs[job_id]
+            if self._keys.get(job.key) is job:
+                del self._keys[job.key]
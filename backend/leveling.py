@@ -0,0 +1,103 @@
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from backend.network import earliest_start, latest_finish
+from backend.resources import ResourceHistogram, resource_histogram
+
+OBJECTIVES = ('moment', 'peak')
+EPSILON = 1e-9
+
+
+def _improves(cost, current):
+    # Lexicographic comparison with a tolerance for rounding
+    for new, old in zip(cost, current):
+        if new < old - EPSILON:
+            return True
+        if new > old + EPSILON:
+            return False
+    return False
+
+
+def _candidate_costs(usage, rows, amounts, starts, span, objective):
+    # Cost of placing the activity at each candidate start, with the activity
+    # itself already removed from usage. The moment change of adding `amounts`
+    # over a window is 2 * sum(amount * usage) + span * sum(amount ** 2), so one
+    # prefix sum over the weighted usage prices every candidate at once. Only
+    # the days the candidates can cover are looked at.
+    offset = starts[0]
+    window = usage[rows, offset:starts[-1] + span]
+    starts = starts - offset
+    weighted = amounts @ window
+    prefix = np.concatenate([[0.0], np.cumsum(weighted)])
+    moment = 2 * (prefix[starts + span] - prefix[starts]) + span * float(amounts @ amounts)
+    if objective == 'moment':
+        return (moment,)
+    # 'peak': lowest local peak first, the moment breaks ties
+    load = (window + amounts[:, None]).max(axis=0)
+    peak = sliding_window_view(load, span).max(axis=1)[starts]
+    return peak, moment
+
+
+def level_schedule(network, activities, snapshot, project_finish, fixed, objective='moment', max_passes=10):
+    # Burgess minimum-moment leveling. Activities are visited from the latest
+    # start backwards; each one moves to the start, between the finish of its
+    # predecessors and the start of its successors, that gives the lowest cost
+    # (the latest such start on ties, which leaves room for the activities
+    # before it). Passes repeat until nothing moves. Only the days an activity
+    # leaves and enters are updated in the histogram after each move.
+    # `fixed` holds node ids that must not move (the critical activities).
+    # Returns the new start of every node and the leveled histogram.
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown leveling objective: {objective}")
+
+    histogram = resource_histogram(activities, snapshot)
+    resource_index = {resource: row for row, resource in enumerate(histogram.resource_types)}
+    horizon = max(histogram.usage.shape[1], math.ceil(project_finish))
+    usage = np.zeros((len(resource_index), horizon))
+    usage[:, :histogram.usage.shape[1]] = histogram.usage
+
+    durations = snapshot.durations
+    start, finish = list(snapshot.start), list(snapshot.finish)
+    movable = []
+    for node, name in enumerate(network.names):
+        demand = {resource: amount for resource, amount in activities[name]['resources'].items() if amount}
+        if node in fixed or not demand or durations[node] <= 0:
+            continue
+        rows = np.asarray([resource_index[resource] for resource in demand], dtype=np.int64)
+        movable.append((node, rows, np.asarray(list(demand.values()), dtype=float), math.ceil(durations[node])))
+
+    for _ in range(max_passes):
+        moved = False
+        movable.sort(key=lambda item: (start[item[0]], network.position[item[0]]), reverse=True)
+        for node, rows, amounts, span in movable:
+            earliest = earliest_start(network, node, start, finish, durations[node])
+            latest = latest_finish(network, node, start, finish, durations[node], project_finish) - durations[node]
+            candidates = np.arange(math.ceil(earliest), math.floor(latest) + 1)
+            if len(candidates) == 0:
+                continue
+
+            first, last = math.floor(start[node]), math.ceil(start[node] + durations[node])
+            usage[rows, first:last] -= amounts[:, None]
+            costs = _candidate_costs(usage, rows, amounts, candidates, span, objective)
+            current = _candidate_costs(usage, rows, amounts, np.asarray([first]), last - first, objective)
+
+            # Lowest cost, the latest start among equals
+            best = np.ones(len(candidates), dtype=bool)
+            for cost in costs:
+                best &= cost <= cost[best].min() + EPSILON
+            choice = np.flatnonzero(best)[-1]
+            if _improves([cost[choice] for cost in costs], [cost[0] for cost in current]):
+                start[node] = int(candidates[choice])
+                finish[node] = start[node] + durations[node]
+                moved = True
+            first, last = math.floor(start[node]), math.ceil(start[node] + durations[node])
+            usage[rows, first:last] += amounts[:, None]
+        if not moved:
+            break
+
+    if np.issubdtype(histogram.usage.dtype, np.integer):
+        usage = np.rint(usage).astype(histogram.usage.dtype)
+    end = max((math.ceil(s + d) for s, d in zip(start, durations) if d > 0), default=0)
+    return start, ResourceHistogram(histogram.resource_types, usage[:, :end])
@@ -0,0 +1,141 @@
+import copy
+import re
+from collections import deque
+
+import networkx as nx
+
+# Precedence relation types: the first letter is the end of the predecessor,
+# the second the end of the successor it constrains (FS = finish-to-start)
+RELATION_TYPES = ('FS', 'SS', 'FF', 'SF')
+PLAIN_LINK = ('FS', 0)
+# The same link seen with time running backwards: starts and finishes swap
+REVERSED_TYPES = {'FS': 'FS', 'SS': 'FF', 'FF': 'SS', 'SF': 'SF'}
+
+# The text form of a typed link, as written in the Predecessors column:
+# "B", "B SS", "B SS+2", "B FF-1" or "B FS+0.5" -> name, type, lag. Text that
+# does not match is a plain finish-to-start predecessor
+LINK_PATTERN = re.compile(r'^(.+?)\s+(FS|SS|FF|SF)\s*([+-]\s*\d+(?:\.\d+)?)?$', re.IGNORECASE)
+
+
+def as_link(entry):
+    # A predecessor is either a name (finish-to-start, no lag) or a
+    # (name, type, lag) tuple
+    if isinstance(entry, str):
+        return entry, 'FS', 0
+    name, kind, lag = entry
+    kind = kind.upper()
+    if kind not in RELATION_TYPES:
+        raise ValueError(f"Unknown relation type '{kind}' for predecessor '{name}'.")
+    return name, kind, lag
+
+
+def earliest_start(network, node, start, finish, duration):
+    # Earliest start of node allowed by the times of its predecessors
+    links = network.pred_links[node]
+    if links is None:
+        return max((finish[pred] for pred in network.preds[node]), default=0)
+    earliest = 0
+    for pred, (kind, lag) in zip(network.preds[node], links):
+        bound = (start[pred] if kind[0] == 'S' else finish[pred]) + lag - (duration if kind[1] == 'F' else 0)
+        if bound > earliest:
+            earliest = bound
+    return earliest
+
+
+def latest_finish(network, node, start, finish, duration, default):
+    # Latest finish of node allowed by the times of its successors
+    links = network.succ_links[node]
+    if links is None:
+        return min((start[succ] for succ in network.succs[node]), default=default)
+    latest = default
+    for succ, (kind, lag) in zip(network.succs[node], links):
+        bound = (start[succ] if kind[1] == 'S' else finish[succ]) - lag + (duration if kind[0] == 'S' else 0)
+        if bound < latest:
+            latest = bound
+    return latest
+
+
+class CompiledNetwork:
+    # Integer-indexed precedence network: activities are numbered in insertion
+    # order, edges are kept as adjacency lists and the topological order is
+    # computed once. ProjectManagementApp keeps one of these until the
+    # structure of the project changes. links maps (predecessor, activity)
+    # -> (type, lag) for every link that is not a plain finish-to-start one.
+    def __init__(self, activities, predecessors, links=None):
+        self.names = list(activities)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.durations = [activities[name]['duration'] for name in self.names]
+        self.preds = [[] for _ in self.names]
+        self.succs = [[] for _ in self.names]
+
+        for name, preds in predecessors.items():
+            if name not in self.index:
+                continue
+            node = self.index[name]
+            for pred in preds:
+                if pred not in self.index:
+                    raise ValueError(f"Unknown predecessor '{pred}' for activity '{name}'.")
+            for pred in sorted(self.index[pred] for pred in preds):
+                self.preds[node].append(pred)
+                self.succs[pred].append(node)
+
+        # (type, lag) per link, aligned with preds and succs; None for a node
+        # whose links are all plain, so the CPM passes keep their fast path
+        self.pred_links = [None] * len(self.names)
+        self.succ_links = [None] * len(self.names)
+        links = {key: link for key, link in (links or {}).items()
+                 if link != PLAIN_LINK and key[0] in self.index and key[1] in self.index}
+        for pred_name, name in links:
+            node, pred = self.index[name], self.index[pred_name]
+            if self.pred_links[node] is None:
+                self.pred_links[node] = [links.get((self.names[other], name), PLAIN_LINK) for other in self.preds[node]]
+            if self.succ_links[pred] is None:
+                self.succ_links[pred] = [links.get((pred_name, self.names[other]), PLAIN_LINK) for other in self.succs[pred]]
+        self.linked = bool(links)
+
+        self.order = self._topological_order()
+        self.position = [0] * len(self.names)
+        for rank, node in enumerate(self.order):
+            self.position[node] = rank
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def edge_count(self):
+        return sum(len(preds) for preds in self.preds)
+
+    def _topological_order(self):
+        # Kahn's algorithm; a FIFO queue keeps the order stable between builds
+        in_degree = [len(preds) for preds in self.preds]
+        queue = deque(i for i, degree in enumerate(in_degree) if degree == 0)
+        order = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for succ in self.succs[node]:
+                in_degree[succ] -= 1
+                if in_degree[succ] == 0:
+                    queue.append(succ)
+
+        if len(order) != len(self.names):
+            raise ValueError("The precedence network contains a cycle.")
+        return order
+
+    def copy(self):
+        # Shares the structure, which never changes; durations are per copy
+        network = copy.copy(self)
+        network.durations = list(self.durations)
+        return network
+
+    def set_duration(self, name, duration):
+        self.durations[self.index[name]] = duration
+
+    def to_networkx(self):
+        graph = nx.DiGraph()
+        graph.add_nodes_from(self.names)
+        for node, preds in enumerate(self.preds):
+            links = self.pred_links[node] or [PLAIN_LINK] * len(preds)
+            for pred, (kind, lag) in zip(preds, links):
+                graph.add_edge(self.names[pred], self.names[node], type=kind, lag=lag)
+        return graph
@@ -0,0 +1,91 @@
+import heapq
+from itertools import count
+
+
+def _completions(network, node, late_start, finish):
+    # Ways to go on from the start of node, as (best length from that start
+    # to the end of the path, next node or None to end at node's finish,
+    # start-to-start offset of the link taken). Only a node with typed or
+    # lagged outgoing links, or none at all, can end a path early.
+    durations = network.durations
+    links = network.succ_links[node]
+    if links is None:
+        if not network.succs[node]:
+            return [(durations[node], None, 0)]
+        return [(durations[node] + finish - late_start[succ], succ, durations[node]) for succ in network.succs[node]]
+    options = [(durations[node], None, 0)]
+    for succ, (kind, lag) in zip(network.succs[node], links):
+        offset = (durations[node] if kind[0] == 'F' else 0) + lag - (durations[succ] if kind[1] == 'F' else 0)
+        options.append((offset + finish - late_start[succ], succ, offset))
+    return options
+
+
+def iter_paths(network, schedule):
+    # Start-to-finish paths in order of decreasing length, generated lazily.
+    # On a deadline-free schedule the longest path from the start of v to the
+    # end of the project is project_finish - late_start[v], so the best way to
+    # complete any partial path is to keep taking the link to the successor
+    # that leaves the most of it. Every other way on along that completion is
+    # a deviation, queued with its exact best length; popping the queue yields
+    # the next longest path. Each path costs O(length x degree x log queue),
+    # however many paths the network has in total. Prefixes are shared as
+    # linked (node, rest) pairs so queuing a deviation does not copy the path.
+    finish = schedule.project_finish
+    late_start = schedule.late_start
+    tie = count()
+
+    # Every activity may start with the project, so a path can also begin at
+    # an activity whose typed links do not hold it back; behind plain links
+    # starting at a predecessor is always at least as long
+    heap = []
+    for node in network.order:
+        if not network.preds[node] or network.pred_links[node] is not None:
+            heap.append((late_start[node] - finish, next(tie), (node, None), 0, False))
+    heapq.heapify(heap)
+
+    while heap:
+        negative_length, _, prefix, length, ended = heapq.heappop(heap)
+        while not ended:
+            options = _completions(network, prefix[0], late_start, finish)
+            best = max(options, key=lambda option: option[0])
+            for option in options:
+                if option is best:
+                    continue
+                value, succ, offset = option
+                if succ is None:
+                    heapq.heappush(heap, (-length - value, next(tie), prefix, length, True))
+                else:
+                    heapq.heappush(heap, (-length - value, next(tie), (succ, prefix), length + offset, False))
+            _, succ, offset = best
+            if succ is None:
+                break
+            prefix = (succ, prefix)
+            length += offset
+
+        path = []
+        while prefix is not None:
+            node, prefix = prefix
+            path.append(node)
+        path.reverse()
+        yield -negative_length, path
+
+
+def critical_paths(network, schedule, limit=None):
+    # Every distinct zero-float chain from a start activity to a finish activity
+    paths = []
+    for length, path in iter_paths(network, schedule):
+        if length < schedule.project_finish or (limit is not None and len(paths) >= limit):
+            break
+        paths.append([network.names[node] for node in path])
+    return paths
+
+
+def near_critical_paths(network, schedule, k=10, max_float=None):
+    # The k longest paths as (path float, path length, activity names)
+    paths = []
+    for length, path in iter_paths(network, schedule):
+        path_float = schedule.project_finish - length
+        if len(paths) >= k or (max_float is not None and path_float > max_float):
+            break
+        paths.append((path_float, length, [network.names[node] for node in path]))
+    return paths
@@ -0,0 +1,128 @@
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backend.network import REVERSED_TYPES
+from backend.rcpsp import (METHODS, PRIORITY_RULES, CapacityProfile, ResourceSchedule, _demands, _parallel, _serial,
+                           priority_keys, schedule_violations)
+
+
+def _reverse(links):
+    return None if links is None else [(REVERSED_TYPES[kind], lag) for kind, lag in links]
+
+
+class _ReversedNetwork:
+    # The precedence network with every link turned around, for backward passes
+    def __init__(self, network):
+        self.preds = network.succs
+        self.succs = network.preds
+        self.pred_links = [_reverse(links) for links in network.succ_links]
+        self.succ_links = [_reverse(links) for links in network.pred_links]
+        self.position = [len(network) - 1 - position for position in network.position]
+        self.size = len(network)
+
+    def __len__(self):
+        return self.size
+
+
+class _Search:
+    # Everything a search pass needs, built once per process
+    def __init__(self, network, capacity, demands, priorities, horizon):
+        self.network = network
+        self.reversed = _ReversedNetwork(network)
+        self.durations = network.durations
+        self.capacity = capacity
+        self.demands = demands
+        self.priorities = priorities
+        self.ranks = {rule: np.argsort(np.argsort(keys, kind='stable'), kind='stable') for rule, keys in priorities.items()}
+        self.horizon = horizon
+
+    def generate(self, method, priority, network=None):
+        profile = CapacityProfile(self.capacity, self.horizon)
+        generate = _serial if method == 'serial' else _parallel
+        return generate(network or self.network, self.durations, priority, self.demands, profile)
+
+    def improve(self, start, finish):
+        # Forward-backward improvement: right-justify the schedule (a serial
+        # pass over the reversed network, latest finish first), then
+        # left-justify it again (earliest start first). Each pass keeps or
+        # shortens the makespan and repeats while it helps.
+        makespan = max(finish, default=0)
+        while True:
+            back_start, back_finish = self.generate('serial', [-value for value in finish], self.reversed)
+            end = max(back_finish, default=0)
+            new_start, new_finish = self.generate('serial', [end - value for value in back_finish])
+            if max(new_finish, default=0) >= makespan:
+                return start, finish, makespan
+            start, finish, makespan = new_start, new_finish, max(new_finish, default=0)
+
+    def run(self, seed, time_budget):
+        # Biased random sampling: every pass perturbs the priority ranks of one
+        # rule by up to +/- spread and builds a schedule with one scheme; the
+        # first pass per rule and scheme is unperturbed. Returns the best
+        # (makespan, start, finish, passes) found before the time budget runs
+        # out, or None; at least one pass always completes. Schedules that
+        # break a link or a resource limit are never kept.
+        rng = np.random.default_rng(seed)
+        deadline = time.monotonic() + time_budget
+        combinations = [(method, rule) for rule in PRIORITY_RULES for method in METHODS]
+        best = None
+        passes = 0
+        while not passes or time.monotonic() < deadline:
+            method, rule = combinations[passes % len(combinations)]
+            ranks = self.ranks[rule]
+            if passes < len(combinations):
+                priority = ranks.tolist()
+            else:
+                spread = rng.uniform(0.05, 0.5)
+                priority = (ranks * rng.uniform(1 - spread, 1 + spread, len(ranks))).tolist()
+            start, finish = self.generate(method, priority)
+            start, finish, makespan = self.improve(start, finish)
+            passes += 1
+            if best is not None and makespan >= best[0]:
+                continue
+            if schedule_violations(self.network, self.durations, self.capacity, self.demands, start, finish):
+                print(f"Portfolio search dropped an infeasible {method}/{rule} schedule.")
+                continue
+            best = (makespan, start, finish)
+        return None if best is None else best + (passes,)
+
+
+# Process-pool workers receive the search state once, via the initializer
+_worker_state = {}
+
+
+def _init_worker(search):
+    _worker_state['search'] = search
+
+
+def _run_worker(seed, time_budget):
+    return _worker_state['search'].run(seed, time_budget)
+
+
+def search_schedule(network, activities, schedule, capacities, time_budget=5.0, workers=1, seed=None):
+    # Portfolio search for a short resource-feasible schedule: randomized
+    # serial and parallel SGS passes over every priority rule, each followed
+    # by forward-backward improvement, spread over `workers` processes until
+    # the time budget (seconds) is spent. Returns the shortest schedule found.
+    if time_budget <= 0:
+        raise ValueError("The time budget must be positive.")
+    capacity, demands = _demands(network, activities, capacities)
+    priorities = {rule: priority_keys(network, schedule, rule) for rule in PRIORITY_RULES}
+    search = _Search(network, capacity, demands, priorities, 2 * math.ceil(schedule.project_finish) + 1)
+    seeds = np.random.SeedSequence(seed).spawn(max(workers, 1))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(search,)) as executor:
+            results = list(executor.map(_run_worker, seeds, [time_budget] * workers))
+    else:
+        results = [search.run(seeds[0], time_budget)]
+
+    found = [result for result in results if result is not None]
+    if not found:
+        raise ValueError("The portfolio search found no schedule within the resource limits.")
+    makespan, start, finish, _ = min(found, key=lambda result: result[0])
+    passes = sum(result[3] for result in found)
+    return ResourceSchedule(network.names, start, finish, 'portfolio', f'{passes} passes')
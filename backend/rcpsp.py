@@ -0,0 +1,240 @@
+import heapq
+import math
+
+import numpy as np
+
+from backend.network import earliest_start
+
+METHODS = ('serial', 'parallel')
+PRIORITY_RULES = ('lft', 'min_slack', 'grpw')
+EPSILON = 1e-9
+
+
+class ResourceSchedule:
+    # Start and finish of every activity in a resource-feasible schedule
+    def __init__(self, names, start, finish, method, rule):
+        self.names = names
+        self.start = start
+        self.finish = finish
+        self.method = method
+        self.rule = rule
+        self.makespan = max(finish, default=0)
+
+    def by_name(self):
+        return dict(zip(self.names, self.start))
+
+    def as_dict(self):
+        return {
+            'method': self.method,
+            'rule': self.rule,
+            'makespan': self.makespan,
+            'start': self.by_name(),
+            'finish': dict(zip(self.names, self.finish))
+        }
+
+
+class CapacityProfile:
+    # Units of each resource type still free on each day. Time-indexed, so
+    # checking or booking an activity touches only the days it covers; the
+    # profile grows when a schedule runs past its current horizon.
+    def __init__(self, capacities, horizon):
+        self.capacity = np.asarray(capacities, dtype=float)
+        self.remaining = np.repeat(self.capacity[:, None], max(horizon, 1), axis=1)
+        # Free units only ever go down, so once no start before day t fits a
+        # given demand, none ever will: remember t per (rows, amounts, span)
+        self.no_fit_before = {}
+
+    def _ensure(self, end):
+        width = self.remaining.shape[1]
+        if end > width:
+            extra = np.repeat(self.capacity[:, None], max(end, 2 * width) - width, axis=1)
+            self.remaining = np.concatenate([self.remaining, extra], axis=1)
+
+    def fits(self, rows, demand, start, span):
+        self._ensure(start + span)
+        return bool((self.remaining[rows, start:start + span] >= demand[:, None] - EPSILON).all())
+
+    def earliest(self, rows, demand, start, span):
+        # First day >= start from which every demanded resource has enough
+        # units free for `span` consecutive days. Days are checked a chunk at a
+        # time; a window is free when it holds no short day, which a running
+        # count of short days answers for every window start at once.
+        key = (rows.tobytes(), demand.tobytes(), span)
+        known = self.no_fit_before.get(key, 0)
+        searched_from = max(start, known)
+        start = searched_from
+        if not self.fits(rows, demand, start, span):
+            chunk = max(4 * span, 64)
+            while True:
+                self._ensure(start + chunk + span)
+                enough = (self.remaining[rows, start:start + chunk + span - 1] >= demand[:, None] - EPSILON).all(axis=0)
+                short = np.concatenate([[0], np.cumsum(~enough)])
+                free = np.flatnonzero(short[span:span + chunk] == short[:chunk])
+                if len(free):
+                    start += int(free[0])
+                    break
+                start += chunk
+                chunk *= 2
+        if searched_from == known:
+            self.no_fit_before[key] = start
+        return start
+
+    def reserve(self, rows, demand, start, span):
+        # Grow first: a slice past the horizon would silently book fewer days
+        self._ensure(start + span)
+        self.remaining[rows, start:start + span] -= demand[:, None]
+
+
+def priority_keys(network, schedule, rule):
+    # Lower key = scheduled first
+    if rule == 'lft':
+        return list(schedule.late_finish)
+    if rule == 'min_slack':
+        return list(schedule.total_float)
+    if rule == 'grpw':
+        # Greatest rank positional weight: own duration plus the durations of the immediate successors
+        durations = network.durations
+        return [-(durations[node] + sum(durations[succ] for succ in network.succs[node])) for node in range(len(network))]
+    raise ValueError(f"Unknown priority rule: {rule}")
+
+
+def _demands(network, activities, capacities):
+    # Per node: the resource rows it needs and how many units of each.
+    # Unlimited resource types never constrain anything and are left out.
+    resource_types = [resource for resource, capacity in capacities.items() if capacity != float('inf')]
+    resource_index = {resource: row for row, resource in enumerate(resource_types)}
+    demands = []
+    for name in network.names:
+        rows, amounts = [], []
+        for resource, amount in activities[name]['resources'].items():
+            if not amount or resource not in resource_index:
+                continue
+            if amount > capacities[resource]:
+                raise ValueError(f"Activity '{name}' needs {amount} units of '{resource}' but only {capacities[resource]} are available.")
+            rows.append(resource_index[resource])
+            amounts.append(amount)
+        demands.append((np.asarray(rows, dtype=np.int64), np.asarray(amounts, dtype=float)) if rows else None)
+    return [capacities[resource] for resource in resource_types], demands
+
+
+def schedule_violations(network, durations, capacity, demands, start, finish):
+    # What a schedule breaks, with capacity and demands as from _demands:
+    # ('precedence', node) for a node starting before its links allow and
+    # ('resource', row, day, units) for a resource type over capacity on a
+    # day. Activities occupy whole days, as in the generation schemes.
+    problems = [('precedence', node) for node in range(len(network))
+                if start[node] < earliest_start(network, node, start, finish, durations[node]) - EPSILON]
+    width = max((math.ceil(value - EPSILON) for value in finish), default=0) + 1
+    usage = np.zeros((len(capacity), width + 1))
+    for node, demand in enumerate(demands):
+        span = math.ceil(durations[node] - EPSILON)
+        if demand is not None and span > 0:
+            rows, amounts = demand
+            usage[rows, start[node]] += amounts
+            usage[rows, start[node] + span] -= amounts
+    usage = np.cumsum(usage, axis=1)
+    for row, day in zip(*np.nonzero(usage > np.asarray(capacity, dtype=float)[:, None] + EPSILON)):
+        problems.append(('resource', int(row), int(day), usage[row, day].item()))
+    return problems
+
+
+def _serial(network, durations, priority, demands, profile):
+    # Serial SGS: take the eligible activity with the best priority and put
+    # it at the earliest time that is precedence- and resource-feasible
+    preds, succs, position = network.preds, network.succs, network.position
+    waiting = [len(preds[node]) for node in range(len(network))]
+    start, finish = [0] * len(network), [0] * len(network)
+    eligible = [(priority[node], position[node], node) for node in range(len(network)) if not waiting[node]]
+    heapq.heapify(eligible)
+    while eligible:
+        _, _, node = heapq.heappop(eligible)
+        time = math.ceil(earliest_start(network, node, start, finish, durations[node]) - EPSILON)
+        span = math.ceil(durations[node] - EPSILON)
+        if demands[node] is not None and span > 0:
+            rows, amounts = demands[node]
+            time = profile.earliest(rows, amounts, time, span)
+            profile.reserve(rows, amounts, time, span)
+        start[node], finish[node] = time, time + durations[node]
+        for succ in succs[node]:
+            waiting[succ] -= 1
+            if not waiting[succ]:
+                heapq.heappush(eligible, (priority[succ], position[succ], succ))
+    return start, finish
+
+
+def _parallel(network, durations, priority, demands, profile):
+    # Parallel SGS: step through the decision times (project start and every
+    # finish); at each one, start as many of the ready activities as the
+    # resources allow, best priority first. Everything booked so far starts at
+    # or before the decision time, so usage never rises after it and checking
+    # the decision day alone is enough. Ready activities are queued by demand
+    # (same resources, same amounts): when the best of a queue does not fit,
+    # none of that queue does, so each decision costs O(started + queues).
+    preds, succs, position = network.preds, network.succs, network.position
+    waiting = [len(preds[node]) for node in range(len(network))]
+    start, finish = [0] * len(network), [0] * len(network)
+    keys = []
+    for demand in demands:
+        keys.append(None if demand is None else (tuple(demand[0].tolist()), tuple(demand[1].tolist())))
+    pending = [(0, node) for node in range(len(network)) if not waiting[node]]  # (ready time, node)
+    heapq.heapify(pending)
+    queues = {}
+    finishes = []
+    time = 0
+    while pending or any(queues.values()):
+        while pending and pending[0][0] <= time:
+            node = heapq.heappop(pending)[1]
+            heapq.heappush(queues.setdefault(keys[node], []), (priority[node], position[node], node))
+
+        profile._ensure(time + 1)
+        free = profile.remaining[:, time].tolist()
+        heads = [(queue[0], key) for key, queue in queues.items() if queue]
+        heapq.heapify(heads)
+        while heads:
+            entry, key = heapq.heappop(heads)
+            node = entry[2]
+            span = math.ceil(durations[node] - EPSILON)
+            if key is not None and span > 0:
+                if any(free[row] < amount - EPSILON for row, amount in zip(*key)):
+                    continue
+                rows, amounts = demands[node]
+                profile.reserve(rows, amounts, time, span)
+                for row, amount in zip(*key):
+                    free[row] -= amount
+            queue = queues[key]
+            heapq.heappop(queue)
+            start[node], finish[node] = time, time + durations[node]
+            heapq.heappush(finishes, math.ceil(finish[node] - EPSILON))
+            for succ in succs[node]:
+                waiting[succ] -= 1
+                if not waiting[succ]:
+                    ready = earliest_start(network, succ, start, finish, durations[succ])
+                    heapq.heappush(pending, (math.ceil(ready - EPSILON), succ))
+            if queue:
+                heapq.heappush(heads, (queue[0], key))
+
+        if pending and pending[0][0] <= time:
+            # Zero-duration activities released more work at this same time
+            continue
+
+        # Next decision time: the next finish, or the next activity to become ready
+        while finishes and finishes[0] <= time:
+            heapq.heappop(finishes)
+        candidates = [finishes[0]] if finishes else []
+        if pending:
+            candidates.append(pending[0][0])
+        time = min(candidates) if candidates else time + 1
+    return start, finish
+
+
+def resource_constrained_schedule(network, activities, schedule, capacities, method='serial', rule='lft'):
+    # Heuristic RCPSP: a schedule generation scheme driven by a priority rule
+    # over the CPM results. capacities maps resource type -> units per day.
+    if method not in METHODS:
+        raise ValueError(f"Unknown scheduling method: {method}")
+    priority = priority_keys(network, schedule, rule)
+    capacity, demands = _demands(network, activities, capacities)
+    profile = CapacityProfile(capacity, 2 * math.ceil(schedule.project_finish) + 1)
+    generate = _serial if method == 'serial' else _parallel
+    start, finish = generate(network, network.durations, priority, demands, profile)
+    return ResourceSchedule(network.names, start, finish, method, rule)
@@ -0,0 +1,100 @@
+import math
+
+import numpy as np
+
+
+class ResourceHistogram:
+    # Units of each resource type in use on each day: usage[r, t] is the
+    # demand for resource_types[r] during day t
+    def __init__(self, resource_types, usage):
+        self.resource_types = resource_types
+        self.usage = usage
+        self.times = np.arange(usage.shape[1])
+
+    @property
+    def total(self):
+        return self.usage.sum(axis=0)
+
+    def peak(self):
+        return dict(zip(self.resource_types, self.usage.max(axis=1, initial=0).tolist()))
+
+    def moment(self):
+        # Resource moment (sum of squared daily usage): the Burgess leveling
+        # measure, lower means a smoother profile for the same work content
+        return dict(zip(self.resource_types, (self.usage.astype(float) ** 2).sum(axis=1).tolist()))
+
+    def over_allocations(self, capacities):
+        # Maximal runs of days on which a resource type exceeds its capacity,
+        # as (resource, first day, day after the last, peak excess)
+        capacity = np.asarray([capacities[resource] for resource in self.resource_types], dtype=float)
+        excess = self.usage - capacity[:, None]
+        over = np.zeros((len(capacity), self.usage.shape[1] + 2), dtype=np.int8)
+        over[:, 1:-1] = excess > 0
+        periods = []
+        for row, resource in enumerate(self.resource_types):
+            edges = np.flatnonzero(np.diff(over[row]))
+            for start, end in zip(edges[::2].tolist(), edges[1::2].tolist()):
+                periods.append((resource, start, end, excess[row, start:end].max().item()))
+        return periods
+
+    def as_dict(self, capacities=None):
+        data = {
+            'time': self.times.tolist(),
+            'usage': {resource: self.usage[i].tolist() for i, resource in enumerate(self.resource_types)},
+            'peak': self.peak(),
+            'moment': self.moment()
+        }
+        if capacities is not None:
+            data['over_allocations'] = [
+                {'resource': resource, 'start': start, 'end': end, 'excess': excess}
+                for resource, start, end, excess in self.over_allocations(capacities)
+            ]
+        return data
+
+    def as_steps(self, capacities=None):
+        # as_dict without the repeats: only the days on which some resource's
+        # usage changes. usage[resource][i] holds from time[i] until
+        # time[i + 1], the last value until end
+        changed = np.ones(self.usage.shape[1], dtype=bool)
+        changed[1:] = (np.diff(self.usage, axis=1) != 0).any(axis=0)
+        data = {
+            'time': self.times[changed].tolist(),
+            'end': self.usage.shape[1],
+            'usage': {resource: self.usage[i, changed].tolist() for i, resource in enumerate(self.resource_types)},
+            'peak': self.peak()
+        }
+        if capacities is not None:
+            # Unlimited resource types have no capacity line
+            data['capacity'] = {resource: capacities[resource] for resource in self.resource_types if math.isfinite(capacities[resource])}
+            data['over_allocations'] = [
+                {'resource': resource, 'start': start, 'end': end, 'excess': excess}
+                for resource, start, end, excess in self.over_allocations(capacities)
+            ]
+        return data
+
+
+def resource_histogram(activities, snapshot):
+    # Range-add with a difference array: +amount on the first day of an
+    # activity, -amount on the day after it ends, then one cumsum per row.
+    # An activity occupies every day it overlaps, so fractional times round outwards.
+    resource_index = {}
+    rows, starts, finishes, amounts = [], [], [], []
+    for name, start, finish in zip(snapshot.names, snapshot.start, snapshot.finish):
+        for resource, amount in activities[name]['resources'].items():
+            if not amount or finish <= start:
+                continue
+            rows.append(resource_index.setdefault(resource, len(resource_index)))
+            starts.append(math.floor(start))
+            finishes.append(math.ceil(finish))
+            amounts.append(amount)
+
+    horizon = max(finishes, default=0)
+    width = horizon + 1
+    rows = np.asarray(rows, dtype=np.int64)
+    amounts = np.asarray(amounts)
+    diff = np.bincount(rows * width + np.asarray(starts, dtype=np.int64), weights=amounts, minlength=len(resource_index) * width)
+    diff -= np.bincount(rows * width + np.asarray(finishes, dtype=np.int64), weights=amounts, minlength=len(resource_index) * width)
+    usage = np.cumsum(diff.reshape(len(resource_index), width)[:, :horizon], axis=1)
+    if amounts.dtype.kind in 'iu' or not len(amounts):
+        usage = np.rint(usage).astype(np.int64)
+    return ResourceHistogram(list(resource_index), usage)
@@ -0,0 +1,103 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backend.array_cpm import compute_batch_schedule
+
+PERCENTILES = (50, 80, 95)
+
+
+class SimulationResult:
+    # Completion-time distribution from a Monte Carlo run
+    def __init__(self, names, finish_times, critical_counts):
+        self.names = names
+        self.finish_times = finish_times
+        self.iterations = len(finish_times)
+        self.criticality = critical_counts / max(self.iterations, 1)
+
+    def percentile(self, q):
+        return float(np.percentile(self.finish_times, q))
+
+    def as_dict(self, bins=30):
+        counts, edges = np.histogram(self.finish_times, bins=bins)
+        return {
+            'iterations': self.iterations,
+            'mean': float(self.finish_times.mean()),
+            'std': float(self.finish_times.std()),
+            'percentiles': {f'P{q}': self.percentile(q) for q in PERCENTILES},
+            'histogram': {'counts': counts.tolist(), 'edges': edges.tolist()},
+            'criticality': dict(zip(self.names, self.criticality.tolist()))
+        }
+
+
+class PertSampler:
+    # Beta-PERT duration model: activities with three-point estimates are
+    # drawn from o + (p - o) * Beta(alpha, beta) with the usual lambda = 4
+    # shape; everything else keeps its deterministic duration.
+    def __init__(self, network, activities):
+        self.base = np.asarray(network.durations, dtype=float)
+        estimated = []
+        low, mode, high = [], [], []
+        for node, name in enumerate(network.names):
+            estimates = activities[name].get('estimates')
+            if estimates is not None and estimates[2] > estimates[0]:
+                estimated.append(node)
+                low.append(estimates[0])
+                mode.append(estimates[1])
+                high.append(estimates[2])
+            elif estimates is not None:
+                self.base[node] = estimates[0]
+        self.estimated = np.asarray(estimated, dtype=np.int64)
+        self.low = np.asarray(low, dtype=float)
+        self.span = np.asarray(high, dtype=float) - self.low
+        self.alpha = 1 + 4 * (np.asarray(mode, dtype=float) - self.low) / self.span
+        self.beta = 1 + 4 * (np.asarray(high, dtype=float) - np.asarray(mode, dtype=float)) / self.span
+
+    def sample(self, rng, size):
+        durations = np.tile(self.base, (size, 1))
+        if len(self.estimated):
+            draws = rng.beta(self.alpha, self.beta, size=(size, len(self.estimated)))
+            durations[:, self.estimated] = self.low + self.span * draws
+        return durations
+
+
+def _run_chunk(array_network, sampler, seed, size):
+    rng = np.random.default_rng(seed)
+    batch = compute_batch_schedule(array_network, sampler.sample(rng, size), floats=True)
+    return batch.project_finish, (batch.total_float <= 1e-9).sum(axis=0)
+
+
+# Process-pool workers receive the network and sampler once, via the initializer
+_worker_state = {}
+
+
+def _init_worker(array_network, sampler):
+    _worker_state['network'] = array_network
+    _worker_state['sampler'] = sampler
+
+
+def _run_worker_chunk(seed, size):
+    return _run_chunk(_worker_state['network'], _worker_state['sampler'], seed, size)
+
+
+def simulate(array_network, sampler, iterations=10000, seed=None, workers=1, chunk_size=2000):
+    # Samples are drawn and scheduled in chunks to bound memory. Each chunk has
+    # its own child seed, so a given seed gives the same result whatever the
+    # number of workers.
+    if iterations <= 0:
+        raise ValueError("The number of iterations must be positive.")
+    chunks = math.ceil(iterations / chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(chunks)
+    sizes = [min(chunk_size, iterations - i * chunk_size) for i in range(chunks)]
+
+    if workers > 1 and chunks > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(array_network, sampler)) as executor:
+            results = list(executor.map(_run_worker_chunk, seeds, sizes))
+    else:
+        results = [_run_chunk(array_network, sampler, chunk_seed, size) for chunk_seed, size in zip(seeds, sizes)]
+
+    finish_times = np.concatenate([finish for finish, _ in results])
+    critical_counts = np.sum([counts for _, counts in results], axis=0)
+    return SimulationResult(array_network.names, finish_times, critical_counts)
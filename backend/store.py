@@ -0,0 +1,82 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from backend.backend import ProjectManagementApp
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    # One session's project and the lock its requests take turns on. users
+    # counts the requests holding or waiting for the lock (guarded by the
+    # store lock); an entry in use is never evicted
+    def __init__(self, key, project):
+        self.key = key
+        self.project = project
+        self.lock = threading.RLock()
+        self.users = 0
+
+
+class ProjectStore:
+    # Project instances keyed by session, least recently used first. Memory is
+    # capped by the number of projects and by the total number of activities
+    # they hold; going over either evicts the least recently used projects.
+    # The store lock only guards the dict, so requests from different
+    # sessions run in parallel while requests from one session are serialised.
+    # Projects that are checked out are skipped when evicting and trimmed
+    # once they are released, so a request never loses its project midway.
+    def __init__(self, max_projects=50, max_activities=500000):
+        self.max_projects = max_projects
+        self.max_activities = max_activities
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def checkout(self, key):
+        # Entry for `key`, created on first use, with its lock held. Returns
+        # (entry, created); hand the entry back with release() when done.
+        with self._lock:
+            entry = self._entries.get(key)
+            created = entry is None
+            if created:
+                entry = self._entries[key] = _Entry(key, ProjectManagementApp())
+            self._entries.move_to_end(key)
+            entry.users += 1
+            self._trim(keep=key)
+        entry.lock.acquire()
+        return entry, created
+
+    def release(self, entry):
+        # Give back a checked-out entry. Its project may have grown while it
+        # was held, and entries skipped while in use may now be evicted, so
+        # the caps are checked again here.
+        with self._lock:
+            entry.users -= 1
+            self._trim(keep=entry.key)
+        entry.lock.release()
+
+    def reset(self, entry, project=None):
+        # Start a checked-out session over with an empty project, or with
+        # `project`, e.g. one a background job has worked on
+        entry.project = ProjectManagementApp() if project is None else project
+        return entry.project
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _trim(self, keep):
+        # Evict from the least recently used end; `keep` and entries in use
+        # are never evicted
+        activities = sum(len(entry.project.activities) for entry in self._entries.values())
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_projects and activities <= self.max_activities:
+                break
+            if key == keep or self._entries[key].users:
+                continue
+            entry = self._entries.pop(key)
+            activities -= len(entry.project.activities)
+            logger.info("Evicted project of session %s (%d activities)", key, len(entry.project.activities))
@@ -0,0 +1,242 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from backend.network import LINK_PATTERN
+from backend.validation import validate_project
+
+REQUIRED_COLUMNS = ['Activity', 'Duration', 'Resources', 'Predecessors', 'Resources per unit cost', 'crash duration', 'crash cost', 'deadline']
+
+
+class ParsedUpload:
+    # One uploaded workbook, parsed once: the sheet as read (for display), one
+    # tuple of add_activity arguments per activity and the validation report.
+    # Shared between sessions and requests, so treat it as read-only.
+    def __init__(self, digest, frame, rows):
+        self.digest = digest
+        self.frame = frame
+        self.rows = rows
+        self.report = validate_project([(row[0], row[1], row[3], row[8]) for row in rows])
+
+
+def file_digest(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_table(filepath):
+    # The first sheet of an .xlsx workbook, a .csv file or a .parquet file as
+    # a DataFrame. Workbooks are streamed row by row from a read-only
+    # openpyxl reader, which never builds the full cell model in memory.
+    extension = os.path.splitext(filepath)[1].lower()
+    if extension == '.csv':
+        return pd.read_csv(filepath, skipinitialspace=True)
+    if extension == '.parquet':
+        try:
+            return pd.read_parquet(filepath)
+        except ImportError:
+            raise ValueError("Reading Parquet files needs pyarrow or fastparquet installed.")
+    if extension not in ('.xlsx', '.xlsm'):
+        return pd.read_excel(filepath)
+
+    try:
+        workbook = load_workbook(filepath, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, KeyError, OSError) as e:
+        # .xlsx files are zip archives; anything else is not a workbook
+        raise ValueError(f"{os.path.basename(filepath)} is not a valid Excel workbook ({e}).")
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, ())
+        keep = [i for i, column in enumerate(header) if column is not None]
+        columns = [[] for _ in keep]
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            row = row + (None,) * (len(header) - len(row))
+            for column, i in zip(columns, keep):
+                column.append(row[i])
+    finally:
+        workbook.close()
+    return pd.DataFrame({str(header[i]): column for i, column in zip(keep, columns)})
+
+
+def _parse_resources(df):
+    # "resource0:2, resource1:3" per row -> (row, resource, units) entries,
+    # one vectorized pass over all rows. Entries that are not name:integer
+    # are skipped; a repeated resource in one row keeps its last value.
+    text = df['Resources'].fillna('none').astype(str).str.strip()
+    entries = text[text.str.lower() != 'none'].str.split(',').explode()
+    parts = entries.str.extract(r'^\s*([^:]+?)\s*:\s*([+-]?\d+)\s*$')
+    invalid = parts[0].isna()
+    if invalid.any():
+        print(f"Skipped {int(invalid.sum())} invalid resource entries, e.g. '{entries[invalid].iloc[0]}'.")
+    parts = parts[~invalid]
+    parsed = pd.DataFrame({'row': parts.index.to_numpy(), 'resource': parts[0].to_numpy(object),
+                           'units': pd.to_numeric(parts[1]).astype(int).to_numpy()})
+    return parsed.drop_duplicates(['row', 'resource'], keep='last')
+
+
+def _parse_predecessors(df):
+    # "A, B SS+2, C FF-1" per row -> (row, name, type, lag) entries
+    text = df['Predecessors'].fillna('none').astype(str).str.strip()
+    entries = text[text.str.lower() != 'none'].str.split(',').explode().str.strip()
+    parts = entries.str.extract(LINK_PATTERN)
+    plain = parts[0].isna()
+    lags = pd.to_numeric(parts[2].str.replace(' ', ''), errors='coerce').fillna(0)
+    return pd.DataFrame({
+        'row': entries.index.to_numpy(),
+        'name': entries.where(plain, parts[0].str.strip()).to_numpy(object),
+        'type': parts[1].str.upper().fillna('FS').to_numpy(object),
+        'lag': lags.to_numpy()
+    })
+
+
+def parse_workbook(filepath):
+    # (frame, rows): rows are (name, duration, resources, predecessors,
+    # resources_per_unit_cost, total_cost, crash_duration, crash_cost,
+    # deadline, estimates) in file order. Every column is parsed with one
+    # vectorized pass; only building the per-activity dicts loops in Python.
+    df = read_table(filepath)
+    df.columns = df.columns.astype(str).str.strip()
+    df = df.reset_index(drop=True)
+
+    # Check for required columns
+    for column in REQUIRED_COLUMNS:
+        if column not in df.columns:
+            raise ValueError(f"Missing required column: {column}")
+
+    names = df['Activity'].astype(str).str.strip().tolist()
+    numbers = {}
+    for column, kind in (('Duration', int), ('crash duration', int), ('crash cost', float)):
+        values = pd.to_numeric(df[column], errors='coerce')
+        if values.isna().any():
+            raise ValueError(f"Activity '{names[int(values.isna().to_numpy().argmax())]}' has no valid {column}.")
+        numbers[column] = values.astype(kind).tolist()
+    deadlines = pd.to_numeric(df['deadline'], errors='coerce')
+    deadlines = [None if pd.isna(value) else int(value) for value in deadlines.tolist()]
+
+    # Units and unit cost of every resource entry; the unit cost comes from
+    # the entry's row of the "Cost per Unit of <resource>" column
+    resources = _parse_resources(df)
+    unit_cost = np.zeros(len(resources))
+    for resource in resources['resource'].unique():
+        mask = (resources['resource'] == resource).to_numpy()
+        cost_col = f'Cost per Unit of {resource}'
+        if cost_col in df.columns:
+            unit_cost[mask] = pd.to_numeric(df[cost_col], errors='coerce').to_numpy(float)[resources['row'].to_numpy()[mask]]
+        else:
+            print(f"Warning: Missing cost per unit for resource '{resource}' ({int(mask.sum())} activities); using 0.")
+    total_cost = np.bincount(resources['row'].to_numpy(), weights=resources['units'].to_numpy() * unit_cost, minlength=len(df))
+
+    resource_dicts = [{} for _ in names]
+    cost_dicts = [{} for _ in names]
+    for row, resource, units, cost in zip(resources['row'].tolist(), resources['resource'].tolist(), resources['units'].tolist(), unit_cost.tolist()):
+        resource_dicts[row][resource] = units
+        cost_dicts[row][resource] = cost
+
+    predecessors = [[] for _ in names]
+    links = _parse_predecessors(df)
+    for row, name, kind, lag in zip(links['row'].tolist(), links['name'].tolist(), links['type'].tolist(), links['lag'].tolist()):
+        predecessors[row].append((name, kind, int(lag) if lag == int(lag) else lag))
+
+    # Optional three-point estimates for the schedule risk simulation
+    estimates = [{} for _ in names]
+    for key, column in (('optimistic', 'optimistic duration'), ('most_likely', 'most likely duration'), ('pessimistic', 'pessimistic duration')):
+        if column in df.columns:
+            values = pd.to_numeric(df[column], errors='coerce')
+            for row, value in zip(np.flatnonzero(values.notna().to_numpy()).tolist(), values.dropna().astype(float).tolist()):
+                estimates[row][key] = value
+
+    rows = list(zip(names, numbers['Duration'], resource_dicts, predecessors, cost_dicts, total_cost.tolist(),
+                    numbers['crash duration'], numbers['crash cost'], deadlines, estimates))
+    print(f"Parsed {len(rows)} activities from {os.path.basename(filepath)}")
+    return df, rows
+
+
+class UploadCache:
+    # Parsed uploads keyed by the SHA-256 of the file, so a workbook is read
+    # once however many routes, sessions or identical re-uploads ask for it.
+    # The newest max_entries stay in memory; with a cache_dir every parse is
+    # also written there as JSON and survives a restart. JSON, not pickle, so
+    # a planted cache file can at worst fail to parse, never run code. Hashing
+    # is skipped while a file's path, size and modification time are unchanged.
+    def __init__(self, max_entries=32, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._digests = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def load(self, filepath):
+        digest = self.digest(filepath)
+        with self._lock:
+            parsed = self._entries.get(digest)
+            if parsed is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return parsed
+            self.misses += 1
+
+        parsed = self._read_disk(digest)
+        if parsed is None:
+            frame, rows = parse_workbook(filepath)
+            parsed = ParsedUpload(digest, frame, rows)
+            self._write_disk(parsed)
+        with self._lock:
+            self._entries[digest] = parsed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return parsed
+
+    def digest(self, filepath):
+        stat = os.stat(filepath)
+        key = (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            digest = file_digest(filepath)
+            with self._lock:
+                self._digests[key] = digest
+                while len(self._digests) > 8 * self.max_entries:
+                    self._digests.popitem(last=False)
+        return digest
+
+    def _disk_path(self, digest):
+        return os.path.join(self.cache_dir, f'{digest}.json')
+
+    def _read_disk(self, digest):
+        if self.cache_dir is None or not os.path.exists(self._disk_path(digest)):
+            return None
+        try:
+            with open(self._disk_path(digest), encoding='utf-8') as file:
+                data = json.load(file)
+            frame = pd.read_json(io.StringIO(data['frame']), orient='split', dtype=False, convert_dates=False)
+            # JSON turns tuples into lists; rows and links are tuples again
+            rows = [(name, duration, resources, [tuple(link) for link in predecessors], *rest)
+                    for name, duration, resources, predecessors, *rest in data['rows']]
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring unreadable cache file for {digest}: {e}")
+            return None
+        return ParsedUpload(digest, frame, rows)
+
+    def _write_disk(self, parsed):
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write then rename, so a concurrent reader never sees half a file
+        partial = f'{self._disk_path(parsed.digest)}.{threading.get_ident()}.tmp'
+        with open(partial, 'w', encoding='utf-8') as file:
+            json.dump({'frame': parsed.frame.to_json(orient='split', date_format='iso'), 'rows': parsed.rows}, file)
+        os.replace(partial, self._disk_path(parsed.digest))
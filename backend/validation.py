@@ -0,0 +1,146 @@
+from collections import Counter
+
+from backend.cpm import compute_schedule
+from backend.network import PLAIN_LINK, CompiledNetwork, as_link
+
+
+class ValidationReport:
+    # Problems found in an uploaded project. Duplicates, unknown predecessors
+    # and cycles make the network unusable (errors); missed deadlines only
+    # mean negative float (warnings). network is the compiled network of a
+    # usable upload, so loading it does not compile it a second time.
+    def __init__(self, duplicates, unknown_predecessors, cycles, deadline_violations, negative_float, network=None):
+        self.duplicates = duplicates
+        self.unknown_predecessors = unknown_predecessors
+        self.cycles = cycles
+        self.deadline_violations = deadline_violations
+        self.negative_float = negative_float
+        self.network = network
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    @property
+    def errors(self):
+        messages = [f"Activity '{name}' is listed more than once." for name in self.duplicates]
+        messages += [f"Unknown predecessor '{pred}' for activity '{name}'." for name, pred in self.unknown_predecessors]
+        messages += ["The precedence network contains a cycle: " + ' -> '.join(cycle + [cycle[0]]) for cycle in self.cycles]
+        return messages
+
+    @property
+    def warnings(self):
+        return [f"Activity '{name}' cannot finish before day {finish} but its deadline is day {deadline} "
+                f"(float {deadline - finish})." for name, deadline, finish in self.deadline_violations]
+
+    def as_dict(self):
+        return {
+            'ok': self.ok,
+            'errors': self.errors,
+            'warnings': self.warnings,
+            'negative_float': self.negative_float
+        }
+
+
+def _strongly_connected_components(succs):
+    # Tarjan's algorithm with an explicit stack, O(V + E)
+    size = len(succs)
+    index, low = [None] * size, [0] * size
+    on_stack = [False] * size
+    stack, components = [], []
+    counter = 0
+    for root in range(size):
+        if index[root] is not None:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, 0)]
+        while work:
+            node, i = work[-1]
+            if i < len(succs[node]):
+                work[-1] = (node, i + 1)
+                succ = succs[node][i]
+                if index[succ] is None:
+                    index[succ] = low[succ] = counter
+                    counter += 1
+                    stack.append(succ)
+                    on_stack[succ] = True
+                    work.append((succ, 0))
+                elif on_stack[succ]:
+                    low[node] = min(low[node], index[succ])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+def _loop_in(component, succs):
+    # Every node of a cyclic component has a successor inside it, so walking
+    # from any member must come back to a node already on the walk
+    members = set(component)
+    seen = {}
+    path = []
+    node = component[0]
+    while node not in seen:
+        seen[node] = len(path)
+        path.append(node)
+        node = next(succ for succ in succs[node] if succ in members)
+    return path[seen[node]:]
+
+
+def validate_project(rows):
+    # rows: (name, duration, predecessors, deadline) per uploaded line, in
+    # file order; predecessors are names or (name, type, lag) links. Linear in activities + links, apart from the CPM pass for
+    # deadlines, which is linear too and only runs on a usable network.
+    counts = Counter(name for name, _, _, _ in rows)
+    duplicates = [name for name, count in counts.items() if count > 1]
+
+    names = list(counts)
+    index = {name: node for node, name in enumerate(names)}
+    succs = [[] for _ in names]
+    predecessors = {name: set() for name in names}
+    links = {}
+    unknown = {}  # (activity, predecessor) -> None, an ordered set
+    for name, _, preds, _ in rows:
+        for entry in preds:
+            pred, kind, lag = as_link(entry)
+            if pred not in index:
+                unknown[(name, pred)] = None
+                continue
+            if pred not in predecessors[name]:
+                predecessors[name].add(pred)
+                succs[index[pred]].append(index[name])
+            if (kind, lag) != PLAIN_LINK:
+                links[(pred, name)] = (kind, lag)
+
+    cycles = []
+    for component in _strongly_connected_components(succs):
+        if len(component) > 1 or component[0] in succs[component[0]]:
+            cycles.append([names[node] for node in _loop_in(component, succs)])
+
+    violations, negative_float = [], {}
+    network = None
+    if not unknown and not cycles:
+        activities = {name: {'duration': duration} for name, duration, _, _ in rows}
+        deadlines = {name: deadline for name, _, _, deadline in rows if deadline is not None}
+        network = CompiledNetwork(activities, predecessors, links)
+        schedule = compute_schedule(network, deadlines)
+        for node, name in enumerate(network.names):
+            if name in deadlines and deadlines[name] < schedule.early_finish[node]:
+                violations.append((name, deadlines[name], schedule.early_finish[node]))
+            if schedule.total_float[node] < 0:
+                negative_float[name] = schedule.total_float[node]
+    return ValidationReport(duplicates, list(unknown), cycles, violations, negative_float, network)
@@ -0,0 +1,44 @@
+import time
+
+import numpy as np
+
+from synthetic import random_project
+from backend.array_cpm import ArrayNetwork, compute_array_schedule
+from backend.cpm import compute_schedule
+
+
+def random_edges(size, max_predecessors=3, window=50, seed=0):
+    # Same shape as synthetic.random_project, generated directly as arrays
+    rng = np.random.default_rng(seed)
+    counts = np.minimum(rng.integers(0, max_predecessors + 1, size), np.arange(size))
+    targets = np.repeat(np.arange(size), counts)
+    reach = np.minimum(targets, window)
+    sources = targets - 1 - (rng.random(len(targets)) * reach).astype(np.int64)
+    edges = np.unique(np.stack([sources, targets], axis=1), axis=0)
+    return edges[:, 0], edges[:, 1]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    print('Dict engine vs numpy engine on the same network')
+    for size in (10000, 50000):
+        network = random_project(size).get_network()
+        _, dict_time = timed(lambda: compute_schedule(network))
+        array_network, build_time = timed(lambda: ArrayNetwork.from_compiled(network))
+        _, array_time = timed(lambda: compute_array_schedule(array_network))
+        print(f'{size:>9} activities: dict {dict_time:.3f}s, numpy {array_time:.3f}s (+{build_time:.3f}s CSR build)')
+
+    print('Numpy engine on networks built straight from edge arrays')
+    for size in (500000, 1000000):
+        sources, targets = random_edges(size)
+        durations = np.random.default_rng(1).integers(1, 21, size)
+        names = [f'A{i}' for i in range(size)]
+        array_network, build_time = timed(lambda: ArrayNetwork(names, durations, sources, targets))
+        schedule, array_time = timed(lambda: compute_array_schedule(array_network))
+        print(f'{size:>9} activities, {len(sources)} links, {array_network.level_count} levels: '
+              f'CSR build {build_time:.2f}s, CPM {array_time:.2f}s, finish {schedule.project_finish}')
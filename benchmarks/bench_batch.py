@@ -0,0 +1,34 @@
+import time
+
+import numpy as np
+
+from synthetic import random_project
+from backend.cpm import compute_schedule
+
+
+if __name__ == '__main__':
+    scenarios = 500
+    for size in (2000, 10000):
+        project_app = random_project(size)
+        network = project_app.get_network()
+        rng = np.random.default_rng(0)
+        base = np.asarray(network.durations)
+        matrix = np.tile(base, (scenarios, 1))
+        # Each scenario slips 50 random activities by up to 10 days
+        for row in matrix:
+            row[rng.choice(size, 50, replace=False)] += rng.integers(1, 11, 50)
+
+        start = time.perf_counter()
+        looped = []
+        for row in matrix:
+            network.durations = row.tolist()
+            looped.append(compute_schedule(network).project_finish)
+        network.durations = base.tolist()
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = project_app.evaluate_scenarios(matrix)
+        batch_time = time.perf_counter() - start
+        assert batch.project_finish.tolist() == looped
+        print(f'{size} activities x {scenarios} scenarios: one CPM per scenario {loop_time:.2f}s, '
+              f'batched {batch_time:.2f}s')
@@ -0,0 +1,20 @@
+import time
+
+from synthetic import random_project
+from backend.cashflow import activity_cost, cash_constrained_schedule
+
+
+if __name__ == '__main__':
+    for size, injections in ((5000, 100), (50000, 1000)):
+        project_app = random_project(size)
+        network = project_app.get_network()
+        schedule = project_app.get_schedule()
+        total = sum(activity_cost(activity) for activity in project_app.activities.values())
+        # Equal injections spread over the unconstrained duration: cash arrives
+        # no faster than the work would like to spend it
+        step = schedule.project_finish / injections
+        cash = {round(i * step): total / injections for i in range(injections)}
+        start = time.perf_counter()
+        result = cash_constrained_schedule(network, project_app.activities, project_app.get_snapshot(), schedule, cash)
+        print(f'{size} activities, {len(cash)} injections: {schedule.project_finish} -> {result.makespan} days '
+              f'in {time.perf_counter() - start:.3f}s')
@@ -0,0 +1,36 @@
+import time
+
+from synthetic import random_project
+
+
+def legacy_cumulative_costs(project_app):
+    # The per-day, per-activity loop the S-curve used before the cost engine
+    snapshot = project_app.get_snapshot()
+    total_duration = max(snapshot.finish)
+    cumulative_cost = 0
+    cumulative_costs = []
+    for t in range(total_duration + 1):
+        for name, activity in project_app.activities.items():
+            start_time = snapshot.start_time(name)
+            duration = activity['duration']
+            daily_cost = sum(amount * activity['resources_per_unit_cost'].get(resource, 0)
+                             for resource, amount in activity['resources'].items()) / duration
+            if start_time <= t < start_time + duration:
+                cumulative_cost += daily_cost
+        cumulative_costs.append(cumulative_cost)
+    return cumulative_costs
+
+
+if __name__ == '__main__':
+    for size in (500, 2000, 5000):
+        project_app = random_project(size)
+        project_app.get_snapshot()
+        start = time.perf_counter()
+        legacy = legacy_cumulative_costs(project_app)
+        legacy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        profile = project_app.get_cost_profile()
+        engine_time = time.perf_counter() - start
+        assert abs(profile.total_cost - legacy[-1]) < 1e-6 * legacy[-1]
+        print(f'{size:>5} activities over {len(legacy)} days: per-day loop {legacy_time:.2f}s, '
+              f'cost engine {engine_time * 1000:.1f}ms')
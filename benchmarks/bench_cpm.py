@@ -0,0 +1,72 @@
+import time
+
+import networkx as nx
+
+from synthetic import random_project
+
+
+def legacy_critical_path(activities, predecessors):
+    # The critical-path calculation as it stood before the compiled network:
+    # a fresh DiGraph per call, the forward pass run twice and the backward
+    # pass run twice
+    def build():
+        graph = nx.DiGraph()
+        for activity, preds in predecessors.items():
+            for pred in preds:
+                graph.add_edge(pred, activity)
+        return graph, list(nx.topological_sort(graph))
+
+    def earliest_start_times():
+        graph, topo_sort = build()
+        earliest_start = {}
+        for node in topo_sort:
+            earliest_start[node] = max([earliest_start[pred] + activities[pred]['duration'] for pred in graph.predecessors(node)], default=0)
+        return earliest_start
+
+    def latest_finish_times():
+        graph, topo_sort = build()
+        earliest_start = earliest_start_times()
+        finish = max(earliest_start[node] + activities[node]['duration'] for node in earliest_start)
+        latest_finish = {}
+        for node in reversed(topo_sort):
+            latest_finish[node] = min([latest_finish[succ] - activities[succ]['duration'] for succ in graph.successors(node)], default=finish)
+        return latest_finish
+
+    graph, topo_sort = build()
+    earliest_start, earliest_finish = {}, {}
+    for node in topo_sort:
+        earliest_start[node] = max([earliest_finish[pred] for pred in graph.predecessors(node)], default=0)
+        earliest_finish[node] = earliest_start[node] + activities[node]['duration']
+    latest_start = {}
+    latest_finish = latest_finish_times()
+    for node in reversed(topo_sort):
+        latest_finish[node] = min([latest_start[succ] for succ in graph.successors(node)], default=earliest_finish[node])
+        latest_start[node] = latest_finish[node] - activities[node]['duration']
+    total_float = {node: latest_finish[node] - earliest_finish[node] for node in graph.nodes()}
+    free_float = {node: min([earliest_start[succ] - earliest_finish[node] for succ in graph.successors(node)], default=total_float[node]) for node in graph.nodes()}
+    return earliest_start, latest_start, total_float, free_float
+
+
+def best_of(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def uncached(project_app):
+    # Force a full recompile so the comparison includes building the network
+    project_app._invalidate(structure=True)
+    return project_app.calculate_critical_path()
+
+
+if __name__ == '__main__':
+    print(f"{'activities':>10} {'legacy (s)':>11} {'compiled (s)':>13} {'cached (s)':>11} {'speedup':>8}")
+    for size in (1000, 5000, 20000, 50000):
+        project_app = random_project(size)
+        legacy = best_of(lambda: legacy_critical_path(project_app.activities, project_app.predecessors))
+        compiled = best_of(lambda: uncached(project_app))
+        cached = best_of(project_app.calculate_critical_path)
+        print(f'{size:>10} {legacy:>11.3f} {compiled:>13.3f} {cached:>11.3f} {legacy / compiled:>7.1f}x')
@@ -0,0 +1,14 @@
+import time
+
+from synthetic import random_project
+
+
+if __name__ == '__main__':
+    for size in (500, 2000):
+        project_app = random_project(size)
+        project_app.get_schedule()
+        start = time.perf_counter()
+        curve = project_app.get_crash_curve()
+        print(f'{size} activities: {len(curve.durations)} breakpoints, '
+              f'{curve.durations[0]} -> {curve.durations[-1]} days for ${curve.costs[-1]:.0f} '
+              f'in {time.perf_counter() - start:.3f}s')
@@ -0,0 +1,33 @@
+import random
+import time
+
+from synthetic import random_project
+
+
+def crash_run(project_app, names, incremental):
+    start = time.perf_counter()
+    for name in names:
+        activity = project_app.activities[name]
+        activity['duration'] = max(activity['crash_duration'], activity['duration'] - 1)
+        if incremental:
+            project_app._duration_changed(name)
+        else:
+            project_app._network.set_duration(name, activity['duration'])
+            project_app._invalidate()
+        project_app.get_schedule()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    for size in (5000, 20000):
+        names = random.Random(1).sample(range(size), 200)
+        names = [f'A{i}' for i in names]
+        full = random_project(size)
+        full.get_schedule()
+        incremental = random_project(size)
+        incremental.get_schedule()
+        full_time = crash_run(full, names, incremental=False)
+        incremental_time = crash_run(incremental, names, incremental=True)
+        assert full.calculate_critical_path() == incremental.calculate_critical_path()
+        print(f'{size:>6} activities, 200 single-activity crashes: full {full_time:.2f}s, '
+              f'incremental {incremental_time:.2f}s ({full_time / incremental_time:.0f}x)')
@@ -0,0 +1,58 @@
+import os
+import random
+import tempfile
+import time
+
+from openpyxl import Workbook
+
+from synthetic import random_project
+from backend.backend import ProjectManagementApp
+from backend.uploads import ParsedUpload, parse_workbook
+
+COLUMNS = ['Activity', 'Duration', 'Resources', 'Predecessors', 'Resources per unit cost', 'crash duration', 'crash cost',
+           'deadline', 'Cost per Unit of resource0', 'Cost per Unit of resource1', 'Cost per Unit of resource2']
+
+
+def sheet_rows(size, seed=0):
+    # The synthetic project as upload rows, with every tenth link typed
+    rng = random.Random(seed)
+    project_app = random_project(size, resource_types=3, seed=seed)
+    for name, activity in project_app.activities.items():
+        links = []
+        for pred in sorted(project_app.predecessors[name]):
+            links.append(f'{pred} {rng.choice(["SS", "FF"])}+{rng.randint(0, 3)}' if rng.random() < 0.1 else pred)
+        resources = ', '.join(f'{resource}:{units}' for resource, units in activity['resources'].items())
+        costs = [activity['resources_per_unit_cost'].get(f'resource{i}', 10.0) for i in range(3)]
+        yield [name, activity['duration'], resources, ', '.join(links) or 'none', 'see columns', activity['crash_duration'],
+               activity['crash_cost'], None] + costs
+
+
+def timed(build):
+    start = time.perf_counter()
+    result = build()
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    directory = tempfile.mkdtemp()
+    for size in (20000, 200000):
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(COLUMNS)
+        csv_lines = [','.join(COLUMNS)]
+        for row in sheet_rows(size):
+            sheet.append(row)
+            csv_lines.append(','.join('' if value is None else f'"{value}"' for value in row))
+        xlsx_path, csv_path = os.path.join(directory, f'{size}.xlsx'), os.path.join(directory, f'{size}.csv')
+        workbook.save(xlsx_path)
+        with open(csv_path, 'w') as file:
+            file.write('\n'.join(csv_lines))
+
+        for path in (csv_path, xlsx_path):
+            (frame, rows), parse_time = timed(lambda: parse_workbook(path))
+            upload, validate_time = timed(lambda: ParsedUpload('bench', frame, rows))
+            project_app = ProjectManagementApp()
+            _, load_time = timed(lambda: project_app.load_activities(rows, upload.report.network))
+            _, cpm_time = timed(project_app.get_schedule)
+            print(f'{size} rows {os.path.splitext(path)[1]}: parse {parse_time:.2f}s, validate {validate_time:.2f}s, '
+                  f'load {load_time:.2f}s, first CPM {cpm_time:.2f}s, ok={upload.report.ok}')
@@ -0,0 +1,15 @@
+import time
+
+from synthetic import random_project
+
+
+if __name__ == '__main__':
+    for size in (2000, 10000):
+        for objective in ('moment', 'peak'):
+            project_app = random_project(size)
+            project_app.get_schedule()
+            start = time.perf_counter()
+            before, after = project_app.level_resources(objective)
+            print(f'{size} activities, {objective}: peak {before.total.max()} -> {after.total.max()}, '
+                  f'moment {sum(before.moment().values()):.0f} -> {sum(after.moment().values()):.0f} '
+                  f'in {time.perf_counter() - start:.3f}s')
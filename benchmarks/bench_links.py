@@ -0,0 +1,34 @@
+import random
+import time
+
+from synthetic import random_project
+from backend.array_cpm import compute_array_schedule
+from backend.cpm import compute_schedule
+
+
+def timed(build):
+    start = time.perf_counter()
+    result = build()
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    rng = random.Random(1)
+    for size in (5000, 50000, 200000):
+        project_app = random_project(size)
+        plain = project_app.get_network()
+        _, plain_list = timed(lambda: compute_schedule(plain))
+        _, plain_array = timed(lambda: compute_array_schedule(project_app.get_array_network()))
+
+        # Turn a third of the links into typed, lagged ones
+        for name, preds in project_app.predecessors.items():
+            for pred in preds:
+                if rng.random() < 1 / 3:
+                    project_app.links[(pred, name)] = (rng.choice(['SS', 'FF', 'SF', 'FS']), rng.randint(-2, 5))
+        project_app._invalidate(structure=True)
+        linked = project_app.get_network()
+        schedule, linked_list = timed(lambda: compute_schedule(linked))
+        _, linked_array = timed(lambda: compute_array_schedule(project_app.get_array_network()))
+        print(f'{size} activities, {linked.edge_count} links ({len(project_app.links)} typed): '
+              f'list {plain_list:.3f}s -> {linked_list:.3f}s, array {plain_array:.3f}s -> {linked_array:.3f}s, '
+              f'finish {schedule.project_finish}')
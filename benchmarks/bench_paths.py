@@ -0,0 +1,32 @@
+import time
+
+from synthetic import random_project
+from backend.backend import ProjectManagementApp
+
+
+def ladder(rungs):
+    # Two parallel activities per rung, each joined to both of the next rung:
+    # 2 ** rungs distinct start-to-finish paths, all of them critical
+    project_app = ProjectManagementApp()
+    previous = []
+    for rung in range(rungs):
+        names = [f'U{rung}', f'L{rung}']
+        for name in names:
+            project_app.add_activity(name, 5, {}, previous, {}, 0, 5, 0)
+        previous = names
+    return project_app
+
+
+if __name__ == '__main__':
+    project_app = ladder(60)
+    start = time.perf_counter()
+    paths = project_app.get_critical_paths(limit=1000)
+    print(f'ladder with 2^60 critical paths: first {len(paths)} in {time.perf_counter() - start:.3f}s')
+
+    for size in (5000, 20000):
+        project_app = random_project(size)
+        project_app.get_schedule()
+        start = time.perf_counter()
+        paths = project_app.get_near_critical_paths(k=100)
+        print(f'{size} activities: top {len(paths)} paths (floats {paths[0][0]}..{paths[-1][0]}) '
+              f'in {time.perf_counter() - start:.3f}s')
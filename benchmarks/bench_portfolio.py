@@ -0,0 +1,21 @@
+import os
+import time
+
+from synthetic import random_project
+from backend.portfolio import search_schedule
+from backend.rcpsp import METHODS, PRIORITY_RULES, resource_constrained_schedule
+
+
+if __name__ == '__main__':
+    project_app = random_project(500, window=10)
+    project_app.max_resources = 6
+    network = project_app.get_network()
+    schedule = project_app.get_schedule()
+    capacities = project_app.get_resource_capacities()
+    single = min(resource_constrained_schedule(network, project_app.activities, schedule, capacities, method, rule).makespan
+                 for method in METHODS for rule in PRIORITY_RULES)
+    print(f'CPM {schedule.project_finish} days, best single priority rule {single} days')
+    for workers in sorted({1, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        result = search_schedule(network, project_app.activities, schedule, capacities, time_budget=5, workers=workers, seed=0)
+        print(f'portfolio, {workers} workers: {result.makespan} days from {result.rule} in {time.perf_counter() - start:.1f}s')
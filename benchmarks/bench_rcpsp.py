@@ -0,0 +1,24 @@
+import time
+
+from synthetic import random_project
+from backend.rcpsp import METHODS, PRIORITY_RULES, _demands, resource_constrained_schedule, schedule_violations
+
+
+if __name__ == '__main__':
+    for size in (5000, 50000):
+        project_app = random_project(size)
+        project_app.max_resources = 12
+        network = project_app.get_network()
+        schedule = project_app.get_schedule()
+        capacities = project_app.get_resource_capacities()
+        capacity, demands = _demands(network, project_app.activities, capacities)
+        for method in METHODS:
+            for rule in PRIORITY_RULES:
+                start = time.perf_counter()
+                result = resource_constrained_schedule(network, project_app.activities, schedule, capacities, method, rule)
+                print(f'{size} activities, {method}/{rule}: {result.makespan} days '
+                      f'(CPM {schedule.project_finish}) in {time.perf_counter() - start:.3f}s')
+                # Every schedule must keep the links and the resource limits
+                problems = schedule_violations(network, network.durations, capacity, demands, result.start, result.finish)
+                if problems:
+                    raise SystemExit(f'{method}/{rule} schedule is infeasible: {len(problems)} violations, e.g. {problems[:3]}')
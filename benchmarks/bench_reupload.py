@@ -0,0 +1,53 @@
+import random
+import time
+
+from synthetic import random_project
+from backend.backend import ProjectManagementApp
+
+
+def timed(build):
+    start = time.perf_counter()
+    result = build()
+    return result, time.perf_counter() - start
+
+
+def upload_rows(project_app):
+    # The project as parsed upload rows, as load_activities takes them
+    return [(name, activity['duration'], activity['resources'], sorted(project_app.predecessors[name]),
+             activity['resources_per_unit_cost'], activity['total_cost'], activity['crash_duration'],
+             activity['crash_cost'], None, {}) for name, activity in project_app.activities.items()]
+
+
+def weekly_revision(rows, rng, share, relink):
+    # New durations for a share of the activities; with relink also one
+    # removed link and one new activity at the end of the network
+    rows = [list(row) for row in rows]
+    for row in rng.sample(rows, int(len(rows) * share)):
+        row[1] = rng.randint(1, 20)
+    if relink:
+        linked = next(row for row in reversed(rows) if row[3])
+        linked[3] = linked[3][1:]
+        rows.append(['Handover', 1, {}, [rows[-1][0]], {}, 0.0, 1, 0.0, None, {}])
+    return [tuple(row) for row in rows]
+
+
+if __name__ == '__main__':
+    rng = random.Random(1)
+    for size, share, relink in ((20000, 0.001, False), (20000, 0.01, False), (20000, 0.01, True), (40000, 0.01, True)):
+        rows = upload_rows(random_project(size))
+        revised = weekly_revision(rows, rng, share, relink)
+
+        project_app = ProjectManagementApp()
+        project_app.load_activities(rows)
+        project_app.get_schedule()
+        changes, update = timed(lambda: project_app.update_activities(revised))
+        updated, _ = timed(project_app.get_schedule)
+
+        def rebuild():
+            fresh = ProjectManagementApp()
+            fresh.load_activities(revised)
+            return fresh.get_schedule()
+        rebuilt, full = timed(rebuild)
+        assert updated.project_finish == rebuilt.project_finish
+        print(f'{size} activities ({len(changes[2])} changed, {len(changes[0])} added, relinked {relink}): '
+              f'update {update:.3f}s, full reload {full:.3f}s, finish {updated.project_finish}')
@@ -0,0 +1,29 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.backend import ProjectManagementApp
+
+
+def random_project(size, max_predecessors=3, window=50, resource_types=5, seed=0):
+    # Random precedence network: every activity depends on up to
+    # max_predecessors earlier activities drawn from a sliding window, which
+    # gives long chains with plenty of parallel branches
+    rng = random.Random(seed)
+    project_app = ProjectManagementApp()
+    for i in range(size):
+        name = f'A{i}'
+        duration = rng.randint(1, 20)
+        resource = f'resource{rng.randrange(resource_types)}'
+        resources = {resource: rng.randint(1, 5)}
+        unit_cost = {resource: float(rng.randint(10, 60))}
+        lower = max(0, i - window)
+        count = min(i - lower, rng.randint(0, max_predecessors))
+        predecessors = [f'A{j}' for j in rng.sample(range(lower, i), count)]
+        total_cost = sum(resources[r] * unit_cost[r] for r in resources)
+        crash_duration = max(1, duration - rng.randint(0, duration // 2))
+        project_app.add_activity(name, duration, resources, predecessors, unit_cost, total_cost,
+                                 crash_duration, float(rng.randint(10, 100)))
+    return project_app